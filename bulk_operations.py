@@ -2,13 +2,21 @@ import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog # Added filedialog explicitly
 import logging
-import uuid # Needed for import
+import json
 from datetime import datetime # Needed for import
 
+try:
+    import orjson # Optional: faster parsing of customers.json on restore
+except ImportError:
+    orjson = None
+
 from utils import open_directory
 # Import custom exceptions (defined in customer_operations)
 from customer_operations import ValidationError, DatabaseError, FilesystemError, CustomerOpsError
 
+# Rows written between status bar updates during an export
+EXPORT_PROGRESS_CHUNK = 1000
+
 
 class BulkOperations:
     """Handles bulk operations on multiple customers using the database."""
@@ -19,6 +27,7 @@ class BulkOperations:
         # Get operational classes from parent
         self.customer_ops = self.parent.customer_ops
         self.data_manager = self.parent.data_manager
+        # Database and file work for bulk actions runs on the parent's I/O pool (CustomerManager.submit_io)
 
     def _get_selected_customer_ids(self):
         """Returns a list of selected customer IDs from the treeview."""
@@ -26,6 +35,36 @@ class BulkOperations:
         # The item ID ('iid') is the customer's database ID
         return list(selected_items)
 
+    def _iter_selected_customers(self, selected_ids):
+        """Yields customer dicts for the given IDs using the parent's customers_by_id index."""
+        by_id = self.parent.customers_by_id
+        return (by_id[customer_id] for customer_id in selected_ids if customer_id in by_id)
+
+    def _iter_with_progress(self, customers, total):
+        """Yields customers unchanged, posting an export progress message to the status bar every chunk."""
+        for count, customer in enumerate(customers, 1):
+            yield customer
+            if count % EXPORT_PROGRESS_CHUNK == 0:
+                # Runs on the export worker; queue the status update for the Tk thread
+                self.parent.call_on_ui_thread(self.data_manager.update_status, f"Exporting... {count}/{total} customers written", 0)
+
+    def _remove_customers_from_tree(self, customer_ids):
+        """Removes deleted customers from the cached list, the ID index and the treeview."""
+        tree = self.parent.customer_tree
+        tree.delete(*[iid for iid in customer_ids if tree.exists(iid)])
+        self.parent._index_remove(customer_ids)
+        self.parent.dropdown_manager.update_customer_dropdown()
+
+    def _apply_updates_to_tree(self, customer_ids, updates):
+        """Applies batch-updated field values to the cached customers and their treeview rows."""
+        self.parent._index_update(customer_ids, updates)
+        tree = self.parent.customer_tree
+        shown_updates = {field: value for field, value in updates.items() if field in tree["columns"]}
+        for customer_id in customer_ids:
+            if tree.exists(customer_id):
+                for field, value in shown_updates.items():
+                    tree.set(customer_id, field, value)
+
     def export_customers(self, format_type):
         """Export selected customers to CSV or JSON."""
         selected_ids = self._get_selected_customer_ids()
@@ -35,26 +74,9 @@ class BulkOperations:
 
         logging.info(f"Exporting {len(selected_ids)} customers as {format_type}...")
 
-        # Fetch data for selected customers from the database
-        selected_customers_data = []
-        conn = self.data_manager._get_db_connection()
-        if not conn: return # Error handled in _get_db_connection
-
-        try:
-            cursor = conn.cursor()
-            placeholders = ','.join('?' for _ in selected_ids)
-            query = f"SELECT * FROM customers WHERE id IN ({placeholders})"
-            cursor.execute(query, tuple(selected_ids))
-            rows = cursor.fetchall()
-            selected_customers_data = [dict(row) for row in rows]
-        except Exception as e:
-             logging.error(f"Error fetching customer data for export: {e}")
-             messagebox.showerror("Database Error", f"Could not fetch customer data for export: {e}")
-             return
-        finally:
-             if conn: conn.close()
-
-        if not selected_customers_data:
+        # Selected customers are looked up lazily in the parent's id index (kept in sync with
+        # the DB on refresh) so the exporters can stream them without building a list first.
+        if not any(customer_id in self.parent.customers_by_id for customer_id in selected_ids):
              messagebox.showwarning("Export Warning", "No data found for selected customers.")
              return
 
@@ -71,19 +93,35 @@ class BulkOperations:
             return # User cancelled
 
         # Export using customer_ops methods (which now handle file writing)
-        success = False
         if format_type == "csv":
-            success = self.customer_ops.export_customers_to_csv(selected_customers_data, filepath)
+            export_fn = self.customer_ops.export_customers_to_csv
+        elif format_type == "json" and self.parent.export_columnar_var.get():
+            export_fn = self.customer_ops.export_customers_to_json_columnar
         elif format_type == "json":
-            success = self.customer_ops.export_customers_to_json(selected_customers_data, filepath)
+            export_fn = self.customer_ops.export_customers_to_json
         else:
              logging.error(f"Unsupported export format: {format_type}")
              messagebox.showerror("Error", f"Unsupported export format: {format_type}")
              return
 
-        # No need for separate success message here, export methods handle it via status bar/logs
-        # if success:
-        #     messagebox.showinfo("Success", f"Exported {len(selected_customers_data)} customers successfully to {filepath}")
+        # Serialize and write on a worker thread so large exports don't freeze the UI
+        if len(selected_ids) == len(self.parent.customers):
+            # Everything is selected: hand over the cached list (rebound, never mutated) as-is
+            selected_customers_data = self.parent.customers
+        else:
+            selected_customers_data = self._iter_selected_customers(selected_ids)
+        if len(selected_ids) > EXPORT_PROGRESS_CHUNK:
+            selected_customers_data = self._iter_with_progress(selected_customers_data, len(selected_ids))
+        self.parent.submit_io(lambda f: self._finish_export(f, filepath), export_fn, selected_customers_data, filepath)
+
+    def _finish_export(self, future, filepath):
+        """Report the result of a background export (runs on the UI thread)."""
+        try:
+            future.result()
+        except CustomerOpsError as e:
+            messagebox.showerror("Export Error", str(e), parent=self.parent.root)
+            return
+        self.data_manager.update_status(f"Export to {filepath} complete.")
 
 
     def batch_update_customers(self):
@@ -100,7 +138,6 @@ class BulkOperations:
         dialog.title(f"Batch Update {len(selected_ids)} Customers")
         dialog.geometry("400x300")
         dialog.transient(self.parent.root)
-        dialog.grab_set()
 
         ttk.Label(dialog, text="Enter new values (leave blank to keep current)").pack(pady=10)
 
@@ -110,13 +147,15 @@ class BulkOperations:
         # Define fields that can be batch updated
         updatable_fields = ["email", "phone", "address"] # Add 'notes' if desired, but needs Text widget
 
-        for field in updatable_fields:
-            frame = ttk.Frame(dialog)
-            frame.pack(fill='x', padx=20, pady=5)
-            ttk.Label(frame, text=f"{field.capitalize()}:", width=8, anchor='w').pack(side='left')
+        # One grid-managed frame for all rows; the entry column stretches
+        fields_frame = ttk.Frame(dialog)
+        fields_frame.pack(fill='x', padx=20)
+        fields_frame.grid_columnconfigure(1, weight=1)
+        for row, field in enumerate(updatable_fields):
+            ttk.Label(fields_frame, text=f"{field.capitalize()}:", width=8, anchor='w').grid(row=row, column=0, pady=5, sticky='w')
             var = tk.StringVar()
-            entry = ttk.Entry(frame, textvariable=var, width=35)
-            entry.pack(side='left', fill='x', expand=True, padx=5)
+            entry = ttk.Entry(fields_frame, textvariable=var, width=35)
+            entry.grid(row=row, column=1, padx=5, pady=5, sticky='ew')
             entry_vars[field] = var
 
         # Update button action
@@ -138,32 +177,9 @@ class BulkOperations:
             if not messagebox.askyesno("Confirm Batch Update", confirm_msg, parent=dialog):
                 return
 
-            updated_count = 0
-            failed_ids = []
-            for customer_id in selected_ids:
-                try:
-                    # update_customer now raises exceptions on failure
-                    if self.customer_ops.update_customer(customer_id, **updates):
-                        updated_count += 1
-                    # else case removed as failure is now an exception
-                except (ValidationError, DatabaseError) as e:
-                     failed_ids.append(customer_id)
-                     logging.warning(f"Failed to update customer ID {customer_id}: {e}")
-                except Exception as e: # Catch unexpected errors per customer
-                     failed_ids.append(customer_id)
-                     logging.error(f"Unexpected error updating customer ID {customer_id}: {e}", exc_info=True)
-
-
-            # Show summary message via status bar or warning dialog
-            summary_msg = f"Batch update complete. Updated: {updated_count}."
-            if failed_ids:
-                summary_msg += f" Failed: {len(failed_ids)} (see logs)."
-                messagebox.showwarning("Batch Update Result", summary_msg) # Keep warning for failures - Corrected Indent
-            else:
-                self.data_manager.update_status(summary_msg) # Use status bar for success - Corrected Indent
-
-            # Refresh the list and close dialog (should happen regardless of failures) - Corrected Indent
-            self.parent.refresh_customer_list()
+            # Apply all updates in one statement/commit on the I/O pool (raises DatabaseError on failure)
+            self.parent.submit_io(lambda f: self._finish_batch_update(f, selected_ids, updates),
+                                  lambda: self.customer_ops.update_multiple_customers(selected_ids, **updates))
             dialog.destroy()
 
         # Dialog buttons
@@ -177,6 +193,35 @@ class BulkOperations:
         x = self.parent.root.winfo_x() + (self.parent.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
         y = self.parent.root.winfo_y() + (self.parent.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
         dialog.geometry(f"+{x}+{y}")
+        # Grab only once the dialog is built and mapped, so Tk can paint while widgets are created
+        dialog.wait_visibility()
+        dialog.grab_set()
+
+
+    def _finish_batch_update(self, future, selected_ids, updates):
+        """Report a background batch update and refresh the affected rows (runs on the UI thread)."""
+        updated_count = 0
+        try:
+            updated_count = future.result()
+        except (ValidationError, DatabaseError) as e:
+             logging.warning(f"Failed to batch update customers {selected_ids}: {e}")
+        except Exception as e:
+             logging.error(f"Unexpected error during batch update: {e}", exc_info=True)
+        failed_count = len(selected_ids) - updated_count
+
+        # Show summary message via status bar or warning dialog
+        summary_msg = f"Batch update complete. Updated: {updated_count}."
+        if failed_count:
+            summary_msg += f" Failed: {failed_count} (see logs)."
+            messagebox.showwarning("Batch Update Result", summary_msg) # Keep warning for failures
+        else:
+            self.data_manager.update_status(summary_msg) # Use status bar for success
+
+        # Patch only the touched rows when everything applied; fall back to a full reload otherwise
+        if failed_count:
+            self.parent.refresh_customer_list(force=True)
+        else:
+            self._apply_updates_to_tree(selected_ids, updates)
 
 
     def delete_selected_customers(self):
@@ -193,10 +238,15 @@ class BulkOperations:
             return
 
         logging.info(f"Attempting to delete {count} customers: {selected_ids}")
-        # Use the optimized multi-delete method (now raises DatabaseError on failure)
+        # Use the optimized multi-delete method on the I/O pool (raises DatabaseError on failure)
+        self.parent.submit_io(lambda f: self._finish_delete(f, selected_ids), self.customer_ops.delete_multiple_customers, selected_ids)
+
+    def _finish_delete(self, future, selected_ids):
+        """Report a background bulk delete and update the treeview (runs on the UI thread)."""
+        count = len(selected_ids)
         deleted_count = 0
         try:
-            deleted_count = self.customer_ops.delete_multiple_customers(selected_ids)
+            deleted_count = future.result()
             # Status update handled within delete_multiple_customers logging, UI shows result below
         except DatabaseError as e:
              logging.error(f"Database error during bulk delete: {e}")
@@ -208,8 +258,11 @@ class BulkOperations:
              deleted_count = 0
 
 
-        # Refresh customer list regardless of errors to show current state
-        self.parent.refresh_customer_list()
+        # Drop just the deleted rows when everything went through; otherwise reload to show current state
+        if deleted_count == count:
+            self._remove_customers_from_tree(selected_ids)
+        else:
+            self.parent.refresh_customer_list(force=True)
 
         # Show result message (status bar update is handled in delete_multiple_customers for success)
         # Only show a message box if there was an issue.
@@ -223,7 +276,6 @@ class BulkOperations:
         TEMPORARILY MODIFIED: Import customers directly from customers.json.
         Ignores 'selective' flag for this temporary purpose.
         """
-        import json # Need json for this temporary function
         json_file_path = "customers.json"
         
         if not os.path.exists(json_file_path):
@@ -233,76 +285,74 @@ class BulkOperations:
         if not messagebox.askyesno("Confirm Restore", f"Restore customer data from {json_file_path}? This will attempt to add customers from the file into the database, skipping duplicates based on directory path."):
             return
 
-        customers_data = []
-        try:
-            with open(json_file_path, 'r') as f:
-                customers_data = json.load(f)
-            if not isinstance(customers_data, list):
-                 raise ValueError("Invalid format in customers.json")
-        except Exception as e:
-             logging.error(f"Error reading or parsing {json_file_path}: {e}", exc_info=True)
-             messagebox.showerror("Error", f"Could not read or parse {json_file_path}:\n{e}")
-             return
+        # Read, parse and insert on the I/O pool so the Tk event loop keeps running
+        self.parent.submit_io(lambda f: self._finish_restore(f, json_file_path), self._restore_customers, json_file_path)
 
+    def _restore_customers(self, json_file_path):
+        """
+        Worker: read customers.json and add its valid entries to the database in one batch.
+        Returns (imported, skipped, failed) counts, or None if the file holds no entries.
+        Raises on read/parse errors.
+        """
+        if orjson:
+            with open(json_file_path, 'rb') as f:
+                customers_data = orjson.loads(f.read())
+        else:
+            with open(json_file_path, 'r', encoding='utf-8') as f: # Exports are raw UTF-8
+                customers_data = json.load(f)
+        if not isinstance(customers_data, list):
+             raise ValueError("Invalid format in customers.json")
         if not customers_data:
-            messagebox.showinfo("Info", f"{json_file_path} is empty. No data to restore.")
-            return
+            return None
 
-        # --- Process Imports from JSON data ---
+        # --- Collect valid entries, then insert them as one batch ---
         imported_count = 0
         skipped_count = 0
         failed_count = 0
-        
+        new_customers = []
+
         for customer in customers_data:
             if not isinstance(customer, dict):
                  logging.warning(f"Skipping invalid entry in JSON: {customer}")
                  failed_count += 1
                  continue
 
-            name = customer.get("name")
-            directory = customer.get("directory")
-            customer_id_from_json = customer.get("id") # Try to keep original ID if possible
-
-            if not name or not directory:
+            if not customer.get("name") or not customer.get("directory"):
                  logging.warning(f"Skipping customer due to missing name or directory: {customer}")
                  failed_count += 1
                  continue
 
-            logging.info(f"Attempting to import customer '{name}' from JSON (Dir: {directory})")
-            
-            try:
-                # Attempt to add customer using data from JSON
-                # Note: add_customer generates a new UUID, we aren't using the one from JSON here
-                # If preserving original IDs is critical, add_customer logic would need modification
-                new_customer_data = self.customer_ops.add_customer(
-                    name=name,
-                    email=customer.get("email", ""),
-                    phone=customer.get("phone", ""),
-                    address=customer.get("address", ""),
-                    notes=customer.get("notes", ""),
-                    directory=directory
-                    # created_at is handled by add_customer
-                )
-                if new_customer_data:
-                    imported_count += 1
-                # else case removed as failure is an exception
-            except DatabaseError as e:
-                 # Specifically catch duplicate directory errors and count as skipped
-                 if "UNIQUE constraint failed: customers.directory" in str(e):
-                      logging.warning(f"Skipping import for '{name}': Directory '{directory}' likely already exists in DB.")
-                      skipped_count += 1
-                 else:
-                      logging.error(f"Database error importing customer '{name}': {e}")
-                      failed_count += 1
-            except ValidationError as e:
-                 logging.error(f"Validation error importing customer '{name}': {e}")
-                 failed_count += 1
-            except Exception as e:
-                 logging.error(f"Unexpected error importing customer '{name}': {e}", exc_info=True)
-                 failed_count += 1
+            # Note: new UUIDs are generated; the IDs stored in the JSON are not preserved
+            new_customers.append(customer)
+
+        logging.info(f"Attempting to import {len(new_customers)} customers from JSON.")
+        try:
+            # Existing directories are ignored by the insert and reported as skipped
+            imported_count = self.customer_ops.add_multiple_customers(new_customers, created_at=datetime.now().isoformat())
+            skipped_count = len(new_customers) - imported_count
+        except (ValidationError, DatabaseError) as e:
+             logging.error(f"Error importing customers from JSON: {e}")
+             failed_count += len(new_customers)
+        except Exception as e:
+             logging.error(f"Unexpected error importing customers from JSON: {e}", exc_info=True)
+             failed_count += len(new_customers)
+        return imported_count, skipped_count, failed_count
+
+    def _finish_restore(self, future, json_file_path):
+        """Refresh the list and summarize a background restore (runs on the UI thread)."""
+        try:
+            counts = future.result()
+        except Exception as e:
+             logging.error(f"Error reading or parsing {json_file_path}: {e}", exc_info=True)
+             messagebox.showerror("Error", f"Could not read or parse {json_file_path}:\n{e}")
+             return
+        if counts is None:
+            messagebox.showinfo("Info", f"{json_file_path} is empty. No data to restore.")
+            return
+        imported_count, skipped_count, failed_count = counts
 
         # Refresh the customer list after all imports attempted
-        self.parent.refresh_customer_list()
+        self.parent.refresh_customer_list(force=True)
 
         # Show summary message
         summary_msg = f"Restore from JSON finished.\n\nSuccessfully added: {imported_count}"
@@ -328,10 +378,10 @@ class BulkOperations:
              return
 
         customer_id = selected_ids[0]
-        logging.debug(f"Attempting to open directory for customer ID: {customer_id}")
+        logging.debug("Attempting to open directory for customer ID: %s", customer_id)
 
-        # Fetch customer data from DB to get the directory path
-        customer_data = self.customer_ops.get_customer_by_id(customer_id)
+        # Look up customer data in the in-memory index to get the directory path
+        customer_data = self.parent.customers_by_id.get(customer_id)
 
         if customer_data and customer_data.get('directory'):
             directory = customer_data['directory']
@@ -1,11 +1,12 @@
 import os
+import errno
 import tkinter as tk # Keep for messagebox dependency in ops classes (needs refactor)
 # from tkinter import messagebox # REMOVE messagebox dependency
 from datetime import datetime
-import sqlite3
 import logging
 import shutil
-import json # Needed for audit log details
+import sqlite3
+import re
 
 from utils import open_directory, format_timestamp
 # Import custom exceptions (assuming they are defined in customer_operations or a shared file)
@@ -19,6 +20,52 @@ except ImportError:
     class DatabaseError(CustomerOpsError): pass
     class FilesystemError(CustomerOpsError): pass
 
+# Characters not allowed in folder names; case numbers map them to '_' with one translate() call
+INVALID_FOLDER_CHARS = '<>:"/\\|?*'
+_CASE_NUMBER_TABLE = str.maketrans({c: '_' for c in INVALID_FOLDER_CHARS})
+# Descriptions additionally replace every non-ASCII character; each run of unsafe characters
+# and underscores becomes a single '_' in one pass
+_UNSAFE_DESC_RUNS = re.compile('[' + re.escape(INVALID_FOLDER_CHARS) + '_\\u0080-\\U0010ffff]+')
+# case_info.txt lines rewritten when a case folder moves to another customer
+_CUSTOMER_ID_LINE = re.compile(r'^Customer ID:.*$', re.M)
+_CUSTOMER_NAME_LINE = re.compile(r'^Customer Name:.*$', re.M)
+# Column order of the case folder SELECT in get_case_folders
+_CASE_FOLDER_COLUMNS = ("id", "customer_id", "case_number", "description", "path", "created_at")
+
+# Case folder SQL, defined once so every call (and execute/executemany alike) sends byte-identical
+# text and hits the connection's compiled-statement cache
+_INSERT_CASE_FOLDER = "INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)"
+_SELECT_CASE_FOLDERS_BY_CUSTOMER = f"SELECT {', '.join(_CASE_FOLDER_COLUMNS)} FROM case_folders WHERE customer_id = ? ORDER BY created_at DESC"
+_SELECT_CASE_FOLDER_PATH = "SELECT path FROM case_folders WHERE id = ?"
+_SELECT_CASE_FOLDER_FOR_MOVE = "SELECT path, customer_id, case_number FROM case_folders WHERE id = ?"
+_SELECT_CASE_FOLDER_WITH_OWNER = ("SELECT cf.customer_id, cf.path, c.name FROM case_folders cf "
+                                  "LEFT JOIN customers c ON c.id = cf.customer_id WHERE cf.id = ?")
+_UPDATE_CASE_FOLDER_OWNER = "UPDATE case_folders SET customer_id = ?, path = ? WHERE id = ?"
+
+# Batches at least this large rebuild the non-unique customer_id index once after inserting
+# instead of updating it row by row (the UNIQUE path index always stays in place)
+CASE_INDEX_REBUILD_MIN_ROWS = 5000
+_DROP_CASE_CUSTOMER_INDEX = "DROP INDEX IF EXISTS idx_case_customer_id"
+_CREATE_CASE_CUSTOMER_INDEX = "CREATE INDEX IF NOT EXISTS idx_case_customer_id ON case_folders (customer_id)"
+
+
+def _move_folder(source, target):
+    """
+    Move a folder with one rename when possible, copying only across volumes.
+    target may be absent or an empty placeholder directory reserving the name.
+    """
+    try:
+        # Same volume: a single atomic rename, regardless of how many files the case holds;
+        # on POSIX it takes over an empty placeholder in the same step
+        os.replace(source, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV: raise
+        # Different volume: fall back to copy + delete. shutil.move would nest the folder inside
+        # an existing placeholder, so release it first (rmdir refuses if it is no longer empty)
+        try: os.rmdir(target)
+        except FileNotFoundError: pass
+        shutil.move(source, target)
+
 
 class CaseFolderOperations:
     """Handles database and filesystem operations related to case folders."""
@@ -32,7 +79,7 @@ class CaseFolderOperations:
         self.data_manager = parent.data_manager
         self.customer_ops = parent.customer_ops
 
-    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False, commit=False):
+    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False, commit=False, return_lastrowid=False):
         """
         Helper method to execute database queries.
         Relies on the implementation in customer_ops for consistency.
@@ -44,7 +91,7 @@ class CaseFolderOperations:
         if hasattr(self.customer_ops, '_execute_query'):
              # Note: This creates a slight dependency, refactoring _execute_query to utils
              # or DataManager might be better long-term.
-             return self.customer_ops._execute_query(query, params, fetch_one, fetch_all, commit)
+             return self.customer_ops._execute_query(query, params, fetch_one, fetch_all, commit, return_lastrowid)
         else:
              # Fallback if delegation isn't possible (e.g., testing setup)
              logging.error("Cannot delegate _execute_query to customer_ops. Using local implementation (may differ).")
@@ -52,10 +99,24 @@ class CaseFolderOperations:
              raise NotImplementedError("Local _execute_query implementation needed if delegation fails.")
 
 
-    def create_case_folder(self, customer_id, case_number, description, template):
+    def _get_customer(self, customer_id):
         """
-        Create a case folder on filesystem and record it in the database.
-        Returns: bool: True on success.
+        Look up a customer via the parent's in-memory customers_by_id index,
+        falling back to the database when the index is absent or has no entry.
+        Raises DatabaseError from the fallback query.
+        """
+        customers_by_id = getattr(self.parent, 'customers_by_id', None)
+        if customers_by_id and customer_id in customers_by_id:
+            return customers_by_id[customer_id]
+        return self.customer_ops.get_customer_by_id(customer_id)
+
+
+    def _prepare_case_folder(self, customer_id, case_number, description, existing_dirs=None):
+        """
+        Validate a new case and work out where its folder goes.
+        existing_dirs: optional set of customer directories already confirmed to exist during
+        this operation; they are not stat-ed again, and newly confirmed ones are added.
+        Returns: tuple: (sanitized case number, folder name, case path, customer name).
         Raises: ValidationError, DatabaseError, FilesystemError on failure.
         """
         # --- Validation ---
@@ -69,7 +130,7 @@ class CaseFolderOperations:
 
         # --- Get Customer Info ---
         try:
-            customer = self.customer_ops.get_customer_by_id(customer_id)
+            customer = self._get_customer(customer_id)
         except DatabaseError as e:
              raise DatabaseError(f"Failed to retrieve customer data: {e}") from e
 
@@ -80,111 +141,206 @@ class CaseFolderOperations:
 
         if not customer_dir:
              raise ValidationError(f"Customer '{customer_name}' has no directory path associated.")
-        if not os.path.exists(customer_dir):
-            # Raise FilesystemError instead of showing messagebox
-            raise FilesystemError(f"Customer directory not found or inaccessible: {customer_dir}")
+        if existing_dirs is None or customer_dir not in existing_dirs:
+            if not os.path.exists(customer_dir):
+                # Raise FilesystemError instead of showing messagebox
+                raise FilesystemError(f"Customer directory not found or inaccessible: {customer_dir}")
+            if existing_dirs is not None: existing_dirs.add(customer_dir)
 
         # --- Prepare Folder Name ---
-        invalid_chars = r'<>:"/\|?*'
-        safe_case_number = ''.join(c if c not in invalid_chars else '_' for c in case_number)
+        safe_case_number = case_number.translate(_CASE_NUMBER_TABLE)
         if safe_case_number != case_number:
-             logging.warning(f"Invalid characters in case number '{case_number}' replaced: '{safe_case_number}'")
+             logging.warning("Invalid characters in case number '%s' replaced: '%s'", case_number, safe_case_number)
              case_number = safe_case_number # Use the sanitized version
 
         folder_name_suffix = ""
         if description:
             original_desc = description
-            safe_desc = ''.join(c if c not in invalid_chars and c.isascii() else '_' for c in description).strip()
-            while '__' in safe_desc: safe_desc = safe_desc.replace('__', '_')
+            safe_desc = _UNSAFE_DESC_RUNS.sub('_', description).strip()
             if safe_desc != original_desc:
-                 logging.info(f"Description sanitized for folder name. Original: '{original_desc}', Sanitized: '{safe_desc}'")
+                 logging.info("Description sanitized for folder name. Original: '%s', Sanitized: '%s'", original_desc, safe_desc)
             if safe_desc:
                 folder_name_suffix = f"_{safe_desc}"
 
         folder_name = f"{case_number}{folder_name_suffix}"
-        case_path = os.path.join(customer_dir, folder_name)
+        return case_number, folder_name, os.path.join(customer_dir, folder_name), customer_name
 
-        # --- Filesystem Operations ---
+    def _build_case_folder(self, case_path, folder_name, info, template):
+        """
+        Create the case folder, its template subfolders and case_info.txt.
+        info holds the case_number, description, customer_id, customer_name and created_at to record.
+        Returns: list: (path, is_dir) pairs for everything created, in creation order.
+        Raises: FilesystemError on failure.
+        """
+        template_name = template.get('name', 'None') if template else 'None'
         try:
-            if os.path.exists(case_path):
-                raise FilesystemError(f"Case folder already exists: {folder_name}")
-            
-            os.makedirs(case_path)
-            logging.info(f"Created directory: {case_path}")
+            # mkdir itself reports an existing folder; no separate exists() stat needed
+            try: os.mkdir(case_path)
+            except FileExistsError: raise FilesystemError(f"Case folder already exists: {folder_name}") from None
+            logging.info("Created directory: %s", case_path)
+            created = [(case_path, True)]
 
             if template and "folders" in template:
+                # Expand nested template paths into every intermediate folder and create them
+                # shallowest-first with plain mkdir, skipping the isdir() probe makedirs(exist_ok=True) does
+                subfolders = set()
                 for subfolder in template["folders"]:
-                    try: os.makedirs(os.path.join(case_path, subfolder), exist_ok=True)
-                    except Exception as sub_e: logging.warning(f"Could not create subfolder '{subfolder}': {sub_e}")
-
-            try: # Create info file (best effort)
-                with open(os.path.join(case_path, "case_info.txt"), 'w') as f:
-                    f.write(f"Case Number: {case_number}\nDescription: {description}\n")
-                    f.write(f"Customer ID: {customer_id}\nCustomer Name: {customer_name}\n")
-                    f.write(f"Created: {datetime.now().isoformat()}\n")
-                    f.write(f"Template: {template.get('name', 'None') if template else 'None'}\n")
-            except Exception as info_e: logging.warning(f"Could not create case_info.txt: {info_e}")
+                    parts = os.path.normpath(subfolder).split(os.sep)
+                    subfolders.update(os.path.join(*parts[:depth]) for depth in range(1, len(parts) + 1))
+                for subfolder in sorted(subfolders, key=lambda sub: (sub.count(os.sep), sub)):
+                    subfolder_path = os.path.join(case_path, subfolder)
+                    try: os.mkdir(subfolder_path); created.append((subfolder_path, True))
+                    except FileExistsError: pass
+                    except Exception as sub_e: logging.warning("Could not create subfolder '%s': %s", subfolder, sub_e)
+
+            try: # Create info file (best effort); the folder is brand new, so O_EXCL never trips
+                content = (
+                    f"Case Number: {info['case_number']}\nDescription: {info['description']}\n"
+                    f"Customer ID: {info['customer_id']}\nCustomer Name: {info['customer_name']}\n"
+                    f"Created: {info['created_at']}\n"
+                    f"Template: {template_name}\n"
+                )
+                info_path = os.path.join(case_path, "case_info.txt")
+                fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                created.append((info_path, False))
+                try: os.write(fd, content.encode())
+                finally: os.close(fd)
+            except Exception as info_e: logging.warning("Could not create case_info.txt: %s", info_e)
+            return created
 
         except OSError as e:
             logging.error(f"Filesystem error creating case folder structure for '{case_path}': {e}")
-            if os.path.exists(case_path) and not os.listdir(case_path):
-                 try: os.rmdir(case_path)
-                 except Exception as rm_e: logging.error(f"Cleanup failed for {case_path}: {rm_e}")
+            # rmdir only removes an empty folder and reports a missing one itself; no probing first
+            try: os.rmdir(case_path)
+            except FileNotFoundError: pass
+            except OSError as rm_e: logging.error(f"Cleanup failed for {case_path}: {rm_e}")
             raise FilesystemError(f"Failed to create case folder structure: {e}") from e
         except Exception as e:
              logging.error(f"Unexpected error during case folder filesystem operations: {e}", exc_info=True)
              raise FilesystemError(f"Unexpected error creating folder: {e}") from e
 
-        # --- Database Operation ---
-        query = """
-            INSERT INTO case_folders (customer_id, case_number, description, path, created_at)
-            VALUES (?, ?, ?, ?, ?)
+    def _remove_case_folder_layout(self, created):
+        """
+        Undo _build_case_folder using the (path, is_dir) list it returned, newest entry first,
+        instead of walking the tree again. Raises OSError if a folder gained unexpected content.
+        """
+        for path, is_dir in reversed(created):
+            try:
+                if is_dir: os.rmdir(path)
+                else: os.unlink(path)
+            except FileNotFoundError: pass
+
+    def create_case_folder(self, customer_id, case_number, description, template):
+        """
+        Create a case folder on filesystem and record it in the database.
+        Returns: bool: True on success.
+        Raises: ValidationError, DatabaseError, FilesystemError on failure.
         """
-        params = (customer_id, case_number, description, case_path, datetime.now().isoformat())
-        inserted_id = None # To store the ID for audit log
+        case_number, folder_name, case_path, customer_name = self._prepare_case_folder(customer_id, case_number, description)
+        created_at = datetime.now().isoformat() # Shared by case_info.txt and the DB record
 
+        # --- Filesystem Operations ---
+        created = self._build_case_folder(case_path, folder_name, {
+            "case_number": case_number, "description": description, "customer_id": customer_id,
+            "customer_name": customer_name, "created_at": created_at,
+        }, template)
+
+        # --- Database Operation ---
+        params = (customer_id, case_number, description, case_path, created_at)
+
+        audit_details = {"customer_id": customer_id, "case_number": case_number, "path": case_path, "description": description}
         try:
-            conn = self.data_manager._get_db_connection()
-            if not conn: raise DatabaseError("Failed to get DB connection for case insert.")
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            inserted_id = cursor.lastrowid # Get the ID of the inserted row
-            conn.commit()
-            success = True
-        except sqlite3.Error as e:
-             logging.error(f"Database error inserting case folder record: {e}")
-             if conn: conn.rollback()
-             success = False
-             # Raise specific error for unique path constraint
-             if "UNIQUE constraint failed: case_folders.path" in str(e):
-                  raise DatabaseError(f"A case folder record with path '{case_path}' already exists.") from e
-             else:
-                  raise DatabaseError(f"Failed to record case folder in database: {e}") from e
-        finally:
-             if conn: conn.close()
-
-        if success:
-            logging.info(f"Recorded case folder '{folder_name}' (ID: {inserted_id}) for customer {customer_id}.")
-            # Log audit event
-            self.data_manager.log_audit_event(
-                action="CASE_ADD",
-                target_id=str(inserted_id), # Log against the case folder ID
-                details={"customer_id": customer_id, "case_number": case_number, "path": case_path, "description": description}
-            )
-            return True
-        else:
-            # If DB insert fails after filesystem success, attempt cleanup
+            # The case row and its audit entry share one transaction, so the pair costs a single commit
+            with self.data_manager.connection() as conn:
+                inserted_id = self._execute_query(_INSERT_CASE_FOLDER, params, return_lastrowid=True)
+                self.data_manager.log_audit_event(action="CASE_ADD", target_id=str(inserted_id), details=audit_details, commit=False)
+                try: conn.commit()
+                except sqlite3.Error as e: raise DatabaseError(f"Database error occurred: {e}") from e
+        except DatabaseError as e:
+            # The folder exists on disk but has no record; remove it so the two stay consistent
             logging.error(f"Failed to record case folder '{folder_name}' in database after creating directory. Attempting cleanup.")
             try:
-                if os.path.exists(case_path):
-                    shutil.rmtree(case_path)
-                    logging.info(f"Cleaned up created folder due to DB error: {case_path}")
+                self._remove_case_folder_layout(created)
+                logging.info("Cleaned up created folder due to DB error: %s", case_path)
             except Exception as cleanup_e:
                 logging.error(f"Filesystem cleanup failed for {case_path}: {cleanup_e}")
                 # Raise a more specific error indicating inconsistent state
-                raise FilesystemError(f"DB insert failed AND filesystem cleanup failed. Path: {case_path}. Cleanup error: {cleanup_e}")
-            # If cleanup succeeded, still indicate failure
-            return False
+                raise FilesystemError(f"DB insert failed AND filesystem cleanup failed. Path: {case_path}. Cleanup error: {cleanup_e}") from e
+            # Raise specific error for unique path constraint
+            if "UNIQUE constraint failed: case_folders.path" in str(e):
+                raise DatabaseError(f"A case folder record with path '{case_path}' already exists.") from e
+            raise DatabaseError(f"Failed to record case folder in database: {e}") from e
+
+        logging.info("Recorded case folder '%s' (ID: %s) for customer %s.", folder_name, inserted_id, customer_id)
+        return True
+
+
+    def create_case_folders(self, records):
+        """
+        Create several case folders and record them all in a single transaction.
+        records: list of dicts with customer_id, case_number and optional description/template.
+        Every record is validated before anything is created; if a folder or the insert fails,
+        the folders already created for the batch are removed again.
+        Returns: int: The number of case folders created.
+        Raises: ValidationError, DatabaseError, FilesystemError on failure.
+        """
+        if not records:
+            return 0
+        created_at = datetime.now().isoformat() # One timestamp for the whole batch
+
+        # --- Validation (all records before touching the filesystem) ---
+        prepared, seen_paths = [], set()
+        existing_dirs = set() # Stat each customer directory once per batch, not once per case
+        for record in records:
+            description = record.get("description", "")
+            case_number, folder_name, case_path, customer_name = self._prepare_case_folder(
+                record.get("customer_id"), record.get("case_number"), description, existing_dirs)
+            if case_path in seen_paths:
+                raise ValidationError(f"Duplicate case folder in batch: {folder_name}")
+            seen_paths.add(case_path)
+            prepared.append((record, case_number, folder_name, case_path, customer_name, description))
+
+        # --- Filesystem Operations ---
+        created_layouts, rows = [], []
+        try:
+            for record, case_number, folder_name, case_path, customer_name, description in prepared:
+                created_layouts.append(self._build_case_folder(case_path, folder_name, {
+                    "case_number": case_number, "description": description, "customer_id": record["customer_id"],
+                    "customer_name": customer_name, "created_at": created_at,
+                }, record.get("template")))
+                rows.append((record["customer_id"], case_number, description, case_path, created_at))
+
+            # --- Database Operation ---
+            with self.data_manager.connection() as conn:
+                if not conn: raise DatabaseError("Failed to establish database connection.")
+                try:
+                    rebuild_index = len(rows) >= CASE_INDEX_REBUILD_MIN_ROWS
+                    if rebuild_index:
+                        # Explicit BEGIN so the DROP is part of the transaction and a failure restores the index
+                        conn.execute("BEGIN")
+                        conn.execute(_DROP_CASE_CUSTOMER_INDEX)
+                    conn.executemany(_INSERT_CASE_FOLDER, rows)
+                    if rebuild_index: conn.execute(_CREATE_CASE_CUSTOMER_INDEX)
+                    self.data_manager.log_audit_event(
+                        action="CASE_ADD_MULTI",
+                        details={"count": len(rows), "paths": [row[3] for row in rows]},
+                        commit=False
+                    )
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"Database error recording {len(rows)} case folders: {e}")
+                    try: conn.rollback()
+                    except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
+                    raise DatabaseError(f"Failed to record case folders in database: {e}") from e
+        except (DatabaseError, FilesystemError):
+            logging.error(f"Case folder batch failed; removing {len(created_layouts)} folders created so far.")
+            for created in created_layouts:
+                try: self._remove_case_folder_layout(created)
+                except Exception as cleanup_e: logging.error(f"Filesystem cleanup failed for {created[0][0]}: {cleanup_e}")
+            raise
+
+        logging.info("Recorded %s case folders.", len(rows))
+        return len(rows)
 
 
     def get_case_folders(self, customer_id):
@@ -194,32 +350,42 @@ class CaseFolderOperations:
         Raises: DatabaseError: If a database error occurs.
         """
         if not customer_id: return []
-        query = "SELECT id, customer_id, case_number, description, path, created_at FROM case_folders WHERE customer_id = ? ORDER BY created_at DESC"
-        params = (customer_id,)
         try:
-            rows = self._execute_query(query, params, fetch_all=True)
+            rows = self._execute_query(_SELECT_CASE_FOLDERS_BY_CUSTOMER, (customer_id,), fetch_all=True)
             if rows is None: return []
-            return [dict(row) for row in rows]
+            # Pair values with the known column names positionally instead of dict(row)'s per-row key lookups
+            return [dict(zip(_CASE_FOLDER_COLUMNS, row)) for row in rows]
         except DatabaseError as e:
              logging.error(f"Failed to get case folders for customer {customer_id}: {e}")
              raise e
 
 
-    def open_case_folder(self, case_folder_id):
+    def get_case_folder_with_owner(self, case_folder_id):
+        """
+        Get a case folder's customer_id and path together with its owner's name (None if the
+        customer row is missing), for the move dialog.
+        Returns: sqlite3.Row or None if no such case folder.
+        Raises: DatabaseError: If a database error occurs.
+        """
+        return self._execute_query(_SELECT_CASE_FOLDER_WITH_OWNER, (case_folder_id,), fetch_one=True)
+
+
+    def open_case_folder(self, case_folder_id, case_path=None):
         """
         Open a case folder using its database ID.
+        case_path: the folder's path if the caller already has it (the case tree keeps it in a
+        hidden column); the database lookup is skipped then.
         Returns: bool: True on success.
         Raises: ValidationError, DatabaseError, FilesystemError.
         """
         if not case_folder_id: raise ValidationError("Case folder ID is required.")
-        query = "SELECT path FROM case_folders WHERE id = ?"
-        params = (case_folder_id,)
-        try:
-            result = self._execute_query(query, params, fetch_one=True)
-        except DatabaseError as e:
-             raise DatabaseError(f"Failed to query case folder path for ID {case_folder_id}: {e}") from e
-        if result and result['path']:
-            case_path = result['path']
+        if not case_path:
+            try:
+                result = self._execute_query(_SELECT_CASE_FOLDER_PATH, (case_folder_id,), fetch_one=True)
+            except DatabaseError as e:
+                 raise DatabaseError(f"Failed to query case folder path for ID {case_folder_id}: {e}") from e
+            case_path = result['path'] if result else None
+        if case_path:
             try:
                 open_directory(case_path) # Raises FilesystemError on failure
                 return True
@@ -253,7 +419,7 @@ class CaseFolderOperations:
 
         # --- Get Target Customer Info ---
         try:
-            target_customer = self.customer_ops.get_customer_by_id(target_customer_id)
+            target_customer = self._get_customer(target_customer_id)
             if not target_customer: raise ValidationError("Target customer not found.")
         except DatabaseError as e: raise DatabaseError(f"Failed to retrieve target customer data: {e}") from e
         target_customer_dir = target_customer.get("directory")
@@ -262,9 +428,8 @@ class CaseFolderOperations:
         if not os.path.exists(target_customer_dir): raise FilesystemError(f"Target customer directory not found: {target_customer_dir}")
 
         # --- Get Current Case Folder Info ---
-        query_case = "SELECT path, customer_id, case_number FROM case_folders WHERE id = ?" # Get case_number too
         try:
-            case_info = self._execute_query(query_case, (case_folder_id,), fetch_one=True)
+            case_info = self._execute_query(_SELECT_CASE_FOLDER_FOR_MOVE, (case_folder_id,), fetch_one=True)
             if not case_info: raise DatabaseError("Case folder record not found in database.")
         except DatabaseError as e: raise DatabaseError(f"Failed to retrieve case folder data: {e}") from e
         source_case_path = case_info['path']
@@ -279,63 +444,72 @@ class CaseFolderOperations:
         # --- Prepare Target Path ---
         case_folder_name = os.path.basename(source_case_path)
         target_case_path = os.path.join(target_customer_dir, case_folder_name)
-        if os.path.exists(target_case_path): raise FilesystemError(f"A folder named '{case_folder_name}' already exists in the target directory.")
+        # Reserve the target name with mkdir, which fails atomically if anything is already there;
+        # no separate exists() check that another process could race
+        try: os.mkdir(target_case_path)
+        except FileExistsError: raise FilesystemError(f"A folder named '{case_folder_name}' already exists in the target directory.") from None
+        except OSError as e: raise FilesystemError(f"Failed to move case folder: {e}") from e
 
         # --- Filesystem Move ---
         try:
-            shutil.move(source_case_path, target_case_path)
-            logging.info(f"Moved folder from {source_case_path} to {target_case_path}")
+            if os.name == 'nt': os.rmdir(target_case_path) # Windows cannot rename onto a directory
+            _move_folder(source_case_path, target_case_path)
+            logging.info("Moved folder from %s to %s", source_case_path, target_case_path)
         except Exception as e:
             logging.error(f"Failed to move case folder '{case_folder_name}': {e}")
+            try: os.rmdir(target_case_path) # Give the reserved name back
+            except OSError: pass
             raise FilesystemError(f"Failed to move case folder: {e}") from e
 
         # --- Database Update ---
-        query_update = "UPDATE case_folders SET customer_id = ?, path = ? WHERE id = ?"
         params_update = (target_customer_id, target_case_path, case_folder_id)
         try:
-            success = self._execute_query(query_update, params_update, commit=True)
-            if not success: raise DatabaseError("Failed to update case folder record for unknown reason.")
-
-            logging.info(f"Updated case folder DB record {case_folder_id}.")
-            # Log audit event for successful move
-            self.data_manager.log_audit_event(
-                action="CASE_MOVE",
-                target_id=str(case_folder_id),
-                details={
-                    "case_number": case_number,
-                    "source_customer_id": source_customer_id,
-                    "target_customer_id": target_customer_id,
-                    "old_path": source_case_path,
-                    "new_path": target_case_path
-                }
-            )
+            with self.data_manager.connection() as conn:
+                self._execute_query(_UPDATE_CASE_FOLDER_OWNER, params_update)
+                # Audit event for the move commits together with the record update
+                self.data_manager.log_audit_event(
+                    action="CASE_MOVE",
+                    target_id=str(case_folder_id),
+                    details={
+                        "case_number": case_number,
+                        "source_customer_id": source_customer_id,
+                        "target_customer_id": target_customer_id,
+                        "old_path": source_case_path,
+                        "new_path": target_case_path
+                    },
+                    commit=False
+                )
+                try: conn.commit()
+                except sqlite3.Error as e: raise DatabaseError(f"Database error occurred: {e}") from e
+            logging.info("Updated case folder DB record %s.", case_folder_id)
 
             # --- Update case_info.txt (Best effort) ---
             try:
                 case_info_path = os.path.join(target_case_path, "case_info.txt")
-                if os.path.exists(case_info_path):
-                    with open(case_info_path, 'r') as f: lines = f.readlines()
-                    updated_lines = []
-                    found_id, found_name = False, False
-                    for line in lines:
-                        if line.startswith("Customer ID:"): updated_lines.append(f"Customer ID: {target_customer_id}\n"); found_id = True
-                        elif line.startswith("Customer Name:"): updated_lines.append(f"Customer Name: {target_customer_name}\n"); found_name = True
-                        else: updated_lines.append(line)
-                    if not found_id: updated_lines.insert(2, f"Customer ID: {target_customer_id}\n")
-                    if not found_name: updated_lines.insert(3, f"Customer Name: {target_customer_name}\n")
-                    source_customer = self.customer_ops.get_customer_by_id(source_customer_id)
+                try:
+                    with open(case_info_path, 'r') as f: content = f.read()
+                except FileNotFoundError: content = None
+                if content is not None:
+                    # Callable replacements so backslashes in names are written literally
+                    id_line, name_line = f"Customer ID: {target_customer_id}", f"Customer Name: {target_customer_name}"
+                    content, found_id = _CUSTOMER_ID_LINE.subn(lambda m: id_line, content, count=1)
+                    content, found_name = _CUSTOMER_NAME_LINE.subn(lambda m: name_line, content, count=1)
+                    if content and not content.endswith("\n"): content += "\n"
+                    if not found_id: content += id_line + "\n"
+                    if not found_name: content += name_line + "\n"
+                    source_customer = self._get_customer(source_customer_id)
                     source_name = source_customer.get('name', 'Unknown') if source_customer else 'Unknown'
-                    updated_lines.append(f"\nMoved from: {source_name} (ID: {source_customer_id}) on {datetime.now().isoformat()}\n")
-                    with open(case_info_path, 'w') as f: f.writelines(updated_lines)
-            except Exception as info_e: logging.warning(f"Could not update case_info.txt after move: {info_e}")
+                    content += f"\nMoved from: {source_name} (ID: {source_customer_id}) on {datetime.now().isoformat()}\n"
+                    with open(case_info_path, 'w') as f: f.write(content)
+            except Exception as info_e: logging.warning("Could not update case_info.txt after move: %s", info_e)
 
             return True # Overall success
 
         except DatabaseError as e:
             logging.error(f"Failed to update case folder record {case_folder_id} after move. Attempting rollback.")
             try:
-                shutil.move(target_case_path, source_case_path)
-                logging.info(f"Moved folder back to {source_case_path} due to DB error.")
+                _move_folder(target_case_path, source_case_path)
+                logging.info("Moved folder back to %s due to DB error.", source_case_path)
             except Exception as rollback_e:
                 logging.error(f"Failed to move folder back during rollback: {rollback_e}")
                 raise FilesystemError(f"DB update failed AND filesystem rollback failed: {e}; Rollback error: {rollback_e}") from e
@@ -3,9 +3,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
 import sys
+import queue
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 
 # Import utility modules
-from utils import setup_logging
+from utils import setup_logging, customer_name_key
 # Import custom exceptions (assuming defined in customer_operations or case_folder_operations)
 try:
     from customer_operations import ValidationError, DatabaseError, FilesystemError
@@ -33,7 +36,10 @@ from treeview_manager import TreeviewManager
 from data_manager import DataManager
 from form_manager import FormManager
 from dropdown_manager import DropdownManager
-from bulk_operations import BulkOperations
+# bulk_operations (thread pool, JSON/file dialogs) is imported on first use; see CustomerManager.bulk_ops
+
+# How often (ms) the Tk thread runs callbacks queued by worker threads; see call_on_ui_thread
+UI_QUEUE_POLL_MS = 50
 
 class CustomerManager:
     """Main application class for customer management"""
@@ -47,14 +53,13 @@ class CustomerManager:
         # Apply a ttk theme for potentially better styling
         try:
             style = ttk.Style(self.root)
-            available_themes = style.theme_names()
-            logging.info(f"Available ttk themes: {available_themes}")
-            preferred_themes = ['clam', 'alt', 'default']
-            for theme in preferred_themes:
-                 if theme in available_themes:
-                     style.theme_use(theme)
-                     logging.info(f"Applied ttk theme: {theme}")
-                     break
+            available_themes = set(style.theme_names())
+            logging.debug("Available ttk themes: %s", available_themes) # Formatted only if debug logging is on
+            preferred_themes = ('clam', 'alt', 'default')
+            theme = next((t for t in preferred_themes if t in available_themes), None)
+            if theme:
+                 style.theme_use(theme)
+                 logging.info(f"Applied ttk theme: {theme}")
             else:
                  logging.warning("Could not apply preferred ttk theme.")
         except tk.TclError as e:
@@ -62,7 +67,18 @@ class CustomerManager:
 
         # Initialize data management (now uses SQLite)
         self.data_manager = DataManager(self)
+        self._customers_sig = self.data_manager.customers_signature() # Taken before loading so later writes are seen
+        self._customer_reload = None # Future of an in-flight background reload
+        self._closing = False # Set by safe_shutdown; late reload results are then dropped
+        self._target_dropdown_cache = None # (customers list, display names, name->ID map, ID->position) for the move dialog
+        self._name_keys_cache = None # (customers list, customer_name_key of each entry) for _index_add
+        # File and bulk database work (exports, batch edits, restores, new directories); see submit_io
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="io")
+        # Worker threads never call Tk themselves: they queue callbacks that the Tk thread runs
+        self._ui_queue = queue.SimpleQueue()
+        self._ui_poll_job = None # root.after() id of the next _drain_ui_queue
         self.customers = self.data_manager.load_customers() # Load initial data from DB
+        self.customers_by_id = {c["id"]: c for c in self.customers} # O(1) lookup by customer ID
         self.templates = self.data_manager.load_templates() # Load initial data from DB
 
         # Initialize helper classes (passing self gives them access to data_manager etc.)
@@ -70,7 +86,7 @@ class CustomerManager:
         self.case_ops = CaseFolderOperations(self)
         self.form_manager = FormManager(self)
         self.dropdown_manager = DropdownManager(self)
-        self.bulk_ops = BulkOperations(self)
+        self._bulk_ops = None # Created by the bulk_ops property the first time a bulk action runs
 
         # Setup variables
         self.setup_variables()
@@ -88,15 +104,61 @@ class CustomerManager:
         # Setup treeview manager
         self.treeview_manager = TreeviewManager(self)
 
-        # Refresh customer list (populates treeview and dropdowns)
-        self.refresh_customer_list() # Initial population
-        # Refresh template list (populates new treeview and dropdowns)
-        self.event_handler.refresh_template_list() # Initial population for templates
-        # Refresh custom field definitions list
-        self.event_handler.refresh_custom_field_definitions_list() # Initial population for custom fields
+        # Fill the case tab's customer dropdown from the customers loaded above. The customer, template
+        # and custom field trees are filled when their tab is first shown (EventHandlers.on_notebook_tab_changed);
+        # the template dropdown was filled from self.templates during UI setup
+        self.dropdown_manager.update_customer_dropdown()
 
         # Handle window close event
         self.root.protocol("WM_DELETE_WINDOW", self.safe_shutdown)
+        # Unexpected errors in any button/key/event callback are reported here (command handlers
+        # only catch the expected ValidationError/DatabaseError/FilesystemError)
+        self.root.report_callback_exception = self.report_callback_exception
+        # Start running callbacks queued by worker threads
+        self._drain_ui_queue()
+
+    def report_callback_exception(self, exc_type, exc_value, exc_tb):
+        """Log an exception that escaped a Tk callback (Tk would only print it to stderr) and tell the user."""
+        logging.critical("Unexpected error in a UI callback.", exc_info=(exc_type, exc_value, exc_tb))
+        messagebox.showerror("Critical Error", f"An unexpected error occurred: {exc_value}", parent=self.root)
+
+    # --- Worker threads -> Tk thread ---
+    # Tkinter may only be used from the thread running mainloop (calls from other threads work only
+    # with a threaded Tcl build while the loop runs, and fail once the root is destroyed). Workers
+    # therefore never call Tk or root.after(): they put callbacks on _ui_queue, which the Tk thread
+    # drains every UI_QUEUE_POLL_MS. After shutdown stops the polling, late entries are never run.
+
+    def call_on_ui_thread(self, fn, *args):
+        """Queue fn(*args) to run on the Tk thread. Safe to call from any thread."""
+        self._ui_queue.put((fn, args))
+
+    def deliver_on_ui_thread(self, future, on_done):
+        """Call on_done(future) on the Tk thread once future has finished. Returns the future."""
+        future.add_done_callback(lambda f: self.call_on_ui_thread(on_done, f))
+        return future
+
+    def submit_io(self, on_done, work, *args):
+        """Run work(*args) on the I/O pool, then call on_done(future) on the Tk thread. Returns the future."""
+        return self.deliver_on_ui_thread(self._io_pool.submit(work, *args), on_done)
+
+    def _drain_ui_queue(self):
+        """Run the callbacks queued by worker threads (Tk thread), then poll again."""
+        # Scheduled first, so a callback that raises (reported by report_callback_exception) doesn't stop the polling
+        self._ui_poll_job = self.root.after(UI_QUEUE_POLL_MS, self._drain_ui_queue)
+        while True:
+            try:
+                fn, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args)
+
+    @property
+    def bulk_ops(self):
+        """BulkOperations instance, imported and created on first use"""
+        if self._bulk_ops is None:
+            from bulk_operations import BulkOperations
+            self._bulk_ops = BulkOperations(self)
+        return self._bulk_ops
 
     def setup_variables(self):
         """Setup Tkinter variables"""
@@ -109,6 +171,9 @@ class CustomerManager:
         
         # Search variable
         self.search_var = tk.StringVar()
+
+        # Export option: write JSON as one array per column instead of one object per customer
+        self.export_columnar_var = tk.BooleanVar(value=False)
         
         # Status variable
         self.status_var = tk.StringVar()
@@ -155,12 +220,59 @@ class CustomerManager:
         self.custom_field_tree = None
         self.cf_name_entry = None # Reference to the name Entry for state control
 
-
-    def refresh_customer_list(self):
-        """Reload customer data from DB and refresh the UI"""
+        # Move case folder dialog: built on first use, then withdrawn and reused (see _get_move_dialog)
+        self._move_dialog = None
+        self._move_request = None # (case folder ID, folder name, display name -> customer ID) being moved
+
+
+    def refresh_customer_list(self, force=False):
+        """
+        Reload customer data from DB on the database worker and refresh the UI when it arrives.
+        The reload is skipped when the change signature is unchanged, unless force is set (used
+        after bulk writes that bypass the _index_* helpers).
+        """
+        if self._closing:
+            return # Shutdown is closing the connection; a reload queued behind it would reopen it
+        if force:
+            self._customers_sig = None # Never matches, so the reload always runs
+        if self._customer_reload is not None and not self._customer_reload.done():
+            logging.info("Customer list refresh already in progress.")
+            return
         logging.info("Refreshing customer list...")
+        self._customer_reload = self.deliver_on_ui_thread(
+            self.data_manager.submit(self._load_customers_if_changed), self._finish_customer_reload)
+
+    def _load_customers_if_changed(self):
+        """
+        Runs on the database worker, so it must not touch Tk: a load error propagates through the
+        future and _finish_customer_reload reports it. Returns (signature, customers); customers is
+        None when unchanged.
+        """
+        signature = self.data_manager.customers_signature()
+        if signature is not None and signature == self._customers_sig:
+            return signature, None
+        return signature, self.data_manager.fetch_customers()
+
+    def _finish_customer_reload(self, future):
+        """Install a reloaded customer list and redraw the views (runs on the UI thread)."""
+        if self._closing:
+            return # The connection is closing; a follow-up reload would reopen it
         try:
-            self.customers = self.data_manager.load_customers()
+            signature, customers = future.result()
+            if customers is None:
+                # Nothing was written since the last load, so the cache is current; an explicit refresh
+                # (F5) still redraws from it, which is cheap and resets a stale-looking view
+                logging.info("Customer data unchanged since last load; skipping reload.")
+                self._refresh_customer_views()
+                self.data_manager.update_status("Customer list is up to date.")
+                return
+            if signature != self.data_manager.customers_signature():
+                # Something was written while loading; keep the incrementally maintained cache and load again
+                self.refresh_customer_list()
+                return
+            self.customers = customers
+            self.customers_by_id = {c["id"]: c for c in self.customers}
+            self._customers_sig = signature
             self.treeview_manager.refresh_customer_list()
             self.dropdown_manager.update_customer_dropdown()
             logging.info("Customer list refresh complete.")
@@ -169,10 +281,77 @@ class CustomerManager:
              messagebox.showerror("Error", f"Failed to load customer data:\n{e}")
 
 
+    # --- Incremental customer cache maintenance ---
+    # self.customers / self.customers_by_id mirror the DB between full reloads. The list is
+    # rebound rather than mutated so a background export iterating it stays consistent.
+
+    def _customer_name_keys(self):
+        """customer_name_key of every cached customer, in list order; rebuilt only when the list is rebound."""
+        cache = self._name_keys_cache
+        if cache is None or cache[0] is not self.customers:
+            cache = self._name_keys_cache = (self.customers, [customer_name_key(c) for c in self.customers])
+        return cache[1]
+
+    def _index_add(self, customer):
+        """
+        Add a newly created customer to the cached list (kept in name order) and ID index.
+        Returns: int: The customer's position in self.customers (after any equal names).
+        """
+        # Bisect the parallel key list; bisect's key= argument needs Python 3.10
+        keys = self._customer_name_keys()
+        key = customer_name_key(customer)
+        index = bisect_right(keys, key)
+        self.customers = self.customers[:index] + [customer] + self.customers[index:]
+        self._name_keys_cache = (self.customers, keys[:index] + [key] + keys[index:])
+        self.customers_by_id[customer["id"]] = customer
+        self._advance_customers_sig()
+        return index
+
+    def _index_update(self, customer_ids, fields):
+        """Apply field updates to cached customers, replacing their dicts rather than mutating them."""
+        by_id = dict(self.customers_by_id)
+        for customer_id in customer_ids:
+            if customer_id in by_id:
+                by_id[customer_id] = {**by_id[customer_id], **fields}
+        customers = [by_id.get(c["id"], c) for c in self.customers]
+        if "name" in fields:
+            customers.sort(key=customer_name_key)
+        self.customers = customers
+        self.customers_by_id = by_id
+        self._advance_customers_sig()
+
+    def _index_remove(self, customer_ids):
+        """Drop deleted customers from the cached list and ID index."""
+        removed = set(customer_ids)
+        by_id = dict(self.customers_by_id)
+        for customer_id in removed:
+            by_id.pop(customer_id, None)
+        self.customers = [c for c in self.customers if c["id"] not in removed]
+        self.customers_by_id = by_id
+        self._advance_customers_sig()
+
+    def _advance_customers_sig(self):
+        """
+        Accept our own write into the cache signature, so the next refresh doesn't reload a list the
+        _index_* helpers already brought up to date. Only done while data_version is unchanged: if
+        another connection committed meanwhile, the old signature is kept and the next refresh reloads.
+        """
+        if self._customers_sig is None:
+            return
+        signature = self.data_manager.customers_signature()
+        if signature is not None and signature[0] == self._customers_sig[0]:
+            self._customers_sig = signature
+
+    def _refresh_customer_views(self):
+        """Redraw the customer treeview and dropdown from the cached customers (no DB reload)."""
+        self.treeview_manager.refresh_customer_list()
+        self.dropdown_manager.update_customer_dropdown()
+
+
     def refresh_case_list(self):
         """Refresh the case list for the selected customer"""
         customer_id = self.selected_customer_id_var.get()
-        logging.info(f"Refreshing case list for customer ID: {customer_id}")
+        logging.info("Refreshing case list for customer ID: %s", customer_id)
         try:
             self.treeview_manager.refresh_case_list()
             logging.info("Case list refresh complete.")
@@ -187,7 +366,7 @@ class CustomerManager:
             # form_manager.save_customer calls customer_ops.add_customer which might raise errors
             new_customer_data = self.form_manager.save_customer()
             if new_customer_data:
-                self.refresh_customer_list() # Refresh list to include the new customer
+                # form_manager has already added the new customer to the cache and its row to the tree
                 self.data_manager.update_status(f"Customer '{new_customer_data.get('name')}' added successfully.")
                 return True
             else:
@@ -198,10 +377,6 @@ class CustomerManager:
              logging.error(f"Error saving customer: {e}")
              messagebox.showerror("Save Error", str(e), parent=self.root)
              return False
-        except Exception as e: # Catch unexpected errors
-             logging.critical("Unexpected error saving customer.", exc_info=True)
-             messagebox.showerror("Critical Error", f"An unexpected error occurred: {e}", parent=self.root)
-             return False
 
     def clear_form(self):
         """Clear the customer form"""
@@ -240,9 +415,6 @@ class CustomerManager:
         except (ValidationError, DatabaseError, FilesystemError) as e:
              logging.error(f"Error creating case folder: {e}")
              messagebox.showerror("Creation Error", str(e), parent=self.root)
-        except Exception as e: # Catch unexpected errors
-             logging.critical("Unexpected error creating case folder.", exc_info=True)
-             messagebox.showerror("Critical Error", f"An unexpected error occurred: {e}", parent=self.root)
 
 
     def load_customers(self):
@@ -276,16 +448,26 @@ class CustomerManager:
         """Create a new directory for a customer via dialog."""
         suggested_name = self.name_var.get().strip() or "new_customer"
         try:
-            new_dir = self.customer_ops.create_directory(suggested_name)
-            if new_dir:
-                self.dir_var.set(new_dir)
-                self.data_manager.update_status(f"Directory created: {new_dir}")
+            new_dir = self.customer_ops.ask_new_directory(suggested_name)
         except (ValidationError, FilesystemError) as e:
              logging.error(f"Error creating directory: {e}")
              messagebox.showerror("Directory Error", str(e), parent=self.root)
-        except Exception as e:
-             logging.critical("Unexpected error creating directory.", exc_info=True)
-             messagebox.showerror("Critical Error", f"An unexpected error occurred: {e}", parent=self.root)
+             return
+        # The dialogs stay on the Tk thread; creating the folder (possibly on a slow network share)
+        # runs on the bulk I/O pool and the form is filled in when it finishes
+        self.data_manager.update_status(f"Creating directory: {new_dir}")
+        self.submit_io(self._finish_create_directory, self.customer_ops.make_directory, new_dir)
+
+    def _finish_create_directory(self, future):
+        """Put a directory created on the I/O pool into the customer form (runs on the UI thread)."""
+        try:
+            new_dir = future.result()
+        except FilesystemError as e:
+             logging.error(f"Error creating directory: {e}")
+             messagebox.showerror("Directory Error", str(e), parent=self.root)
+             return
+        self.dir_var.set(new_dir)
+        self.data_manager.update_status(f"Directory created: {new_dir}")
 
 
     def open_customer_directory(self):
@@ -305,9 +487,6 @@ class CustomerManager:
         except (ValidationError, FilesystemError, DatabaseError) as e:
              logging.error(f"Error exporting customers: {e}")
              messagebox.showerror("Export Error", str(e), parent=self.root)
-        except Exception as e:
-             logging.critical("Unexpected error exporting customers.", exc_info=True)
-             messagebox.showerror("Critical Error", f"An unexpected error occurred during export: {e}", parent=self.root)
 
 
     def batch_update_customers(self):
@@ -333,63 +512,70 @@ class CustomerManager:
             
             case_folder_id = selected_items[0]
             
-            # Fetch necessary info (might raise DatabaseError)
-            case_info = self.case_ops._execute_query("SELECT customer_id, path FROM case_folders WHERE id = ?", (case_folder_id,), fetch_one=True)
+            # Fetch the case and its owner's name in one statement (might raise DatabaseError)
+            case_info = self.case_ops.get_case_folder_with_owner(case_folder_id)
             if not case_info:
                  messagebox.showerror("Error", "Could not retrieve case folder details.", parent=self.root)
                  return
             source_customer_id = case_info['customer_id']
             case_folder_name = os.path.basename(case_info['path'])
-
-            source_customer = self.customer_ops.get_customer_by_id(source_customer_id)
-            source_name = source_customer.get("name", "Unknown") if source_customer else "Unknown"
-
-            all_customers = self.data_manager.load_customers()
+            source_name = case_info['name'] or "Unknown"
 
         except DatabaseError as e:
              logging.error(f"Error fetching data for move dialog: {e}")
              messagebox.showerror("Database Error", f"Could not fetch data needed to move folder:\n{e}", parent=self.root)
              return
-        except Exception as e:
-             logging.critical("Unexpected error preparing move dialog.", exc_info=True)
-             messagebox.showerror("Error", f"An unexpected error occurred preparing the move: {e}", parent=self.root)
-             return
 
-        # --- Create Dialog ---
+        # --- Show Dialog (built on first use, then reused) ---
+        display_names, target_customers_map = self._move_target_choices(source_customer_id)
+        self._move_request = (case_folder_id, case_folder_name, target_customers_map)
+        dialog = self._get_move_dialog()
+        self._move_source_label.configure(text=f"{source_name} (ID: {source_customer_id})")
+        self._move_case_label.configure(text=case_folder_name)
+        self._move_target_dropdown['values'] = display_names
+        if display_names: self._move_target_dropdown.current(0)
+        else: self._move_target_var.set("")
+
+        # Center dialog
+        dialog.deiconify()
+        dialog.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
+        dialog.geometry(f"+{x}+{y}")
+        # Modal grab only after the target list is built and the window is mapped
+        dialog.wait_visibility()
+        dialog.grab_set()
+
+    def _get_move_dialog(self):
+        """Return the (withdrawn) move case folder dialog, creating its widgets the first time."""
+        if self._move_dialog is not None and self._move_dialog.winfo_exists():
+            return self._move_dialog
+
         dialog = tk.Toplevel(self.root)
+        dialog.withdraw() # Shown by move_case_folder once its labels and targets are filled in
         dialog.title("Move Case Folder")
         dialog.geometry("500x250")
         dialog.transient(self.root)
-        dialog.grab_set()
+        dialog.protocol("WM_DELETE_WINDOW", self._hide_move_dialog)
 
         # Source customer display
         source_frame = ttk.Frame(dialog); source_frame.pack(fill='x', padx=20, pady=(20, 10))
         ttk.Label(source_frame, text="Source Customer:").pack(side='left', padx=(0, 10))
-        ttk.Label(source_frame, text=f"{source_name} (ID: {source_customer_id})").pack(side='left')
+        self._move_source_label = ttk.Label(source_frame)
+        self._move_source_label.pack(side='left')
 
         # Case folder display
         case_frame = ttk.Frame(dialog); case_frame.pack(fill='x', padx=20, pady=10)
         ttk.Label(case_frame, text="Case Folder:").pack(side='left', padx=(0, 10))
-        ttk.Label(case_frame, text=case_folder_name).pack(side='left')
+        self._move_case_label = ttk.Label(case_frame)
+        self._move_case_label.pack(side='left')
 
         # Target customer dropdown
         target_frame = ttk.Frame(dialog); target_frame.pack(fill='x', padx=20, pady=10)
         ttk.Label(target_frame, text="Target Customer:").pack(side='left', padx=(0, 10))
-        target_var = tk.StringVar()
-        target_dropdown = ttk.Combobox(target_frame, textvariable=target_var, width=40, state="readonly")
-        target_dropdown.pack(side='left', fill='x', expand=True)
-
-        # Populate target dropdown
-        target_customers_map = {}
-        display_names = []
-        for customer in all_customers:
-            cust_id = customer.get("id")
-            if cust_id != source_customer_id:
-                display_name = f"{customer.get('name', 'Unnamed')} (ID: {cust_id})"
-                target_customers_map[display_name] = cust_id
-                display_names.append(display_name)
-        target_dropdown['values'] = display_names
-        if display_names: target_dropdown.current(0)
+        self._move_target_var = tk.StringVar()
+        self._move_target_dropdown = ttk.Combobox(target_frame, textvariable=self._move_target_var, width=40, state="readonly")
+        self._move_target_dropdown.pack(side='left', fill='x', expand=True)
 
         # Warning label
         warning_frame = ttk.Frame(dialog); warning_frame.pack(fill='x', padx=20, pady=10)
@@ -397,42 +583,65 @@ class CustomerManager:
 
         # Buttons
         btn_frame = ttk.Frame(dialog); btn_frame.pack(fill='x', padx=20, pady=20)
+        ttk.Button(btn_frame, text="Move", command=self._on_move_confirmed).pack(side='right', padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=self._hide_move_dialog).pack(side='right', padx=5)
+
+        self._move_dialog = dialog
+        return dialog
+
+    def _hide_move_dialog(self):
+        """Release the modal grab and withdraw the move dialog for reuse."""
+        self._move_dialog.grab_release()
+        self._move_dialog.withdraw()
+
+    def _on_move_confirmed(self):
+        """Move button handler: move the case folder in self._move_request to the selected customer."""
+        dialog = self._move_dialog
+        case_folder_id, case_folder_name, target_customers_map = self._move_request
+        selected_display_name = self._move_target_var.get()
+        if not selected_display_name:
+            messagebox.showerror("Error", "Please select a target customer.", parent=dialog)
+            return
+        target_customer_id = target_customers_map.get(selected_display_name)
+        if not target_customer_id:
+             messagebox.showerror("Error", "Invalid target customer selection.", parent=dialog)
+             return
 
-        def on_move():
-            selected_display_name = target_var.get()
-            if not selected_display_name:
-                messagebox.showerror("Error", "Please select a target customer.", parent=dialog)
-                return
-            target_customer_id = target_customers_map.get(selected_display_name)
-            if not target_customer_id:
-                 messagebox.showerror("Error", "Invalid target customer selection.", parent=dialog)
-                 return
-
-            try:
-                move_successful = self.case_ops.move_case_folder(case_folder_id, target_customer_id)
-                if move_successful: # Returns True on success, False if no-op, raises on error
-                    dialog.destroy()
-                    self.refresh_case_list()
-                    self.refresh_customer_list()
-                    self.data_manager.update_status(f"Case folder '{case_folder_name}' moved successfully.")
-                # else: # Handle False return (no-op) if needed, e.g., show info message
-                #    messagebox.showinfo("Info", "Case folder already belongs to the target customer.", parent=dialog)
-
-            except (ValidationError, DatabaseError, FilesystemError) as e:
-                 logging.error(f"Error moving case folder: {e}")
-                 messagebox.showerror("Move Error", str(e), parent=dialog)
-            except Exception as e:
-                 logging.critical("Unexpected error moving case folder.", exc_info=True)
-                 messagebox.showerror("Critical Error", f"An unexpected error occurred: {e}", parent=dialog)
-
-        ttk.Button(btn_frame, text="Move", command=on_move).pack(side='right', padx=5)
-        ttk.Button(btn_frame, text="Cancel", command=dialog.destroy).pack(side='right', padx=5)
+        try:
+            move_successful = self.case_ops.move_case_folder(case_folder_id, target_customer_id)
+            if move_successful: # Returns True on success, False if no-op, raises on error
+                self._hide_move_dialog()
+                self.refresh_case_list() # Customer records are unchanged by a move
+                self.data_manager.update_status(f"Case folder '{case_folder_name}' moved successfully.")
+            # else: # Handle False return (no-op) if needed, e.g., show info message
+            #    messagebox.showinfo("Info", "Case folder already belongs to the target customer.", parent=dialog)
 
-        # Center dialog
-        dialog.update_idletasks()
-        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
-        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
-        dialog.geometry(f"+{x}+{y}")
+        except (ValidationError, DatabaseError, FilesystemError) as e:
+             logging.error(f"Error moving case folder: {e}")
+             messagebox.showerror("Move Error", str(e), parent=dialog)
+
+    def _move_target_choices(self, source_customer_id):
+        """
+        Return (display_names, display name -> customer ID map) for the move dialog; display_names
+        omits the source customer. The full name list, the map and each customer's position are
+        built once per customer cache (every cache update rebinds self.customers, so the identity of
+        that list is the cache key); a dialog open then only slices the source out of the list.
+        """
+        cache = self._target_dropdown_cache
+        if cache is None or cache[0] is not self.customers:
+            # One pass builds the map; its keys (insertion ordered, so still sorted by name) are the display names
+            customers_map = {
+                f"{customer.get('name', 'Unnamed')} (ID: {customer['id']})": customer["id"]
+                for customer in self.customers
+            }
+            positions = {customer_id: i for i, customer_id in enumerate(customers_map.values())}
+            cache = self._target_dropdown_cache = (self.customers, list(customers_map), customers_map, positions)
+        _, display_names, customers_map, positions = cache
+        i = positions.get(source_customer_id)
+        if i is not None:
+            display_names = display_names[:i] + display_names[i + 1:]
+        # The source's own entry stays in the map; it is never offered, so it can't be selected
+        return display_names, customers_map
 
     def safe_shutdown(self):
         """Handle graceful shutdown procedures."""
@@ -440,10 +649,31 @@ class CustomerManager:
         # Add any other necessary cleanup steps here
         # e.g., saving unsaved changes, closing network connections
 
-        # Close the database connection
+        if self._closing:
+            return # Close already under way (window closed twice)
+        self._closing = True
+
+        # Hide the window now; draining queued work and closing the connection (which may checkpoint
+        # the WAL) run on the database worker, and the window is destroyed once that has finished
+        self.root.withdraw()
+        closing = self.data_manager.submit(self._close_database)
+        self.deliver_on_ui_thread(closing, self._finish_shutdown)
+
+    def _close_database(self):
+        """Runs on the database worker after any reloads queued before it: wait for I/O pool work, then close."""
+        self._io_pool.shutdown(wait=True)
         self.data_manager.close_db()
 
-        # Destroy the Tkinter window
+    def _finish_shutdown(self, future):
+        """Destroy the Tkinter window once the database is closed (runs on the UI thread)."""
+        try:
+            future.result()
+        except Exception as e:
+            logging.error(f"Error closing the database during shutdown: {e}", exc_info=True)
+        self.data_manager.shutdown_worker() # Idle by now; joins the worker thread
+        if self._ui_poll_job is not None:
+            self.root.after_cancel(self._ui_poll_job)
+            self._ui_poll_job = None
         self.root.destroy()
         logging.info("Application shut down gracefully.")
 
@@ -466,8 +696,6 @@ if __name__ == "__main__":
         app.run()
     except Exception as e:
          logging.critical("Unhandled exception caused application to crash.", exc_info=True)
-         # Ensure messagebox is imported if needed here
-         from tkinter import messagebox
          messagebox.showerror("Critical Error", f"A critical error occurred:\n{e}\nPlease check the app.log file for details.")
          try: root.destroy()
          except: pass
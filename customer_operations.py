@@ -1,4 +1,5 @@
 import os
+import re
 import uuid
 import csv
 import json
@@ -10,6 +11,26 @@ import logging
 
 from utils import open_directory, format_timestamp
 
+try:
+    import orjson # Optional: much faster JSON encoding for exports and bulk ID lists
+except ImportError:
+    orjson = None
+
+# Write buffer for export files, so small rows are flushed in large blocks
+EXPORT_BUFFER_SIZE = 1 << 20
+
+# Customer fields written by the exporters, in column order
+CUSTOMER_EXPORT_FIELDS = ["id", "name", "email", "phone", "address", "notes", "directory", "created_at"]
+# Columns a batch update may set (names are interpolated into the SET clause)
+BATCH_UPDATABLE_FIELDS = {"name", "email", "phone", "address", "notes"}
+# Characters replaced by '_' in a suggested directory name: anything str.isalnum() rejects (\W), plus '_'
+_UNSAFE_DIR_NAME_CHAR = re.compile(r'\W|_')
+
+
+def _json_id_array(customer_ids):
+    """Encode IDs as a JSON array for json_each(?); always str, since newer SQLite reads a bytes value as JSONB."""
+    return orjson.dumps(list(customer_ids)).decode() if orjson else json.dumps(list(customer_ids))
+
 # Define custom exception classes for specific operational errors
 class CustomerOpsError(Exception):
     """Base exception for CustomerOperations errors."""
@@ -44,47 +65,53 @@ class CustomerOperations:
                   raise ValueError("CustomerOperations requires a parent with a 'data_manager' attribute.")
 
 
-    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False, commit=False):
+    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False, commit=False, return_lastrowid=False):
         """
         Helper method to execute database queries.
-        Returns fetched data, True on successful commit, or None/[] on fetch.
+        Returns fetched data, True on success (the new rowid if return_lastrowid), or None/[] on fetch.
         Raises DatabaseError for sqlite3 errors.
         """
-        conn = self.data_manager._get_db_connection()
-        if not conn:
-            raise DatabaseError("Failed to establish database connection.")
+        with self.data_manager.connection() as conn:
+            if not conn:
+                raise DatabaseError("Failed to establish database connection.")
+
+            result = None
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                if commit:
+                    conn.commit()
+                    result = cursor.lastrowid if return_lastrowid else True # Indicate commit success
+                elif fetch_one:
+                    result = cursor.fetchone()
+                elif fetch_all:
+                    result = cursor.fetchall()
+                else: # Query executed without commit/fetch (e.g., PRAGMA, or a write the caller commits)
+                     result = cursor.lastrowid if return_lastrowid else True # Indicate execution success
+
+            except sqlite3.Error as e:
+                logging.error(f"Database query error: {e}\nQuery: {query}\nParams: {params}")
+                if commit:
+                    try: conn.rollback()
+                    except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
+                # Raise a custom exception instead of showing messagebox
+                raise DatabaseError(f"Database error occurred: {e}") from e
+        
+        return result
 
-        result = None
-        try:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            if commit:
-                conn.commit()
-                result = True # Indicate commit success
-            elif fetch_one:
-                result = cursor.fetchone()
-            elif fetch_all:
-                result = cursor.fetchall()
-            else: # Query executed without commit/fetch (e.g., PRAGMA)
-                 result = True # Indicate execution success
 
+    def _commit(self, conn):
+        """Commit the shared connection's open transaction. Raises DatabaseError on failure."""
+        try: conn.commit()
         except sqlite3.Error as e:
-            logging.error(f"Database query error: {e}\nQuery: {query}\nParams: {params}")
-            if commit:
-                try: conn.rollback()
-                except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
-            # Raise a custom exception instead of showing messagebox
+            logging.error(f"Commit failed: {e}")
             raise DatabaseError(f"Database error occurred: {e}") from e
-        finally:
-            if conn:
-                conn.close()
-        
-        return result
 
 
-    def add_customer(self, name, email, phone, address, notes, directory):
+    def add_customer(self, name, email, phone, address, notes, directory, created_at=None):
         """
         Add a new customer to the database.
+        created_at defaults to now; bulk callers can pass one shared timestamp for the batch.
         Returns: dict: The newly created customer data on success.
         Raises: ValidationError: If name or directory is missing.
                 DatabaseError: If a database error occurs (e.g., duplicate directory).
@@ -95,7 +122,7 @@ class CustomerOperations:
             raise ValidationError("Customer directory is required.")
 
         customer_id = str(uuid.uuid4())
-        created_at = datetime.now().isoformat()
+        created_at = created_at or datetime.now().isoformat()
 
         query = """
             INSERT INTO customers (id, name, email, phone, address, notes, directory, created_at)
@@ -104,15 +131,19 @@ class CustomerOperations:
         params = (customer_id, name, email, phone, address, notes, directory, created_at)
 
         try:
-            success = self._execute_query(query, params, commit=True)
+            # The insert and its audit entry are committed together
+            with self.data_manager.connection() as conn:
+                success = self._execute_query(query, params)
+                if success:
+                    self.data_manager.log_audit_event(
+                        action="CUSTOMER_ADD",
+                        target_id=customer_id,
+                        details={"name": name, "directory": directory, "email": email, "phone": phone},
+                        commit=False
+                    )
+                    self._commit(conn)
             if success:
                 logging.info(f"Added customer '{name}' with ID {customer_id}.")
-                # Log audit event
-                self.data_manager.log_audit_event(
-                    action="CUSTOMER_ADD",
-                    target_id=customer_id,
-                    details={"name": name, "directory": directory, "email": email, "phone": phone}
-                )
                 return {
                     "id": customer_id, "name": name, "email": email, "phone": phone,
                     "address": address, "notes": notes, "directory": directory, "created_at": created_at
@@ -127,31 +158,97 @@ class CustomerOperations:
                 raise e
 
 
+    def add_multiple_customers(self, customers, created_at=None):
+        """
+        Insert multiple customers in a single transaction.
+        Rows whose directory is already in the database are skipped rather than failing the batch.
+        Returns: int: The number of customers inserted.
+        Raises: ValidationError: If any entry is missing a name or directory.
+                DatabaseError: If a database error occurs during the transaction.
+        """
+        if not customers:
+            return 0
+        created_at = created_at or datetime.now().isoformat()
+
+        rows = []
+        for customer in customers:
+            if not customer.get("name"):
+                raise ValidationError("Customer name is required.")
+            if not customer.get("directory"):
+                raise ValidationError("Customer directory is required.")
+            rows.append((
+                str(uuid.uuid4()), customer["name"], customer.get("email", ""), customer.get("phone", ""),
+                customer.get("address", ""), customer.get("notes", ""), customer["directory"], created_at
+            ))
+
+        with self.data_manager.connection() as conn:
+            if not conn:
+                 raise DatabaseError("Failed to establish database connection.")
+
+            added_count = 0
+            try:
+                cursor = conn.cursor()
+                query = """
+                    INSERT OR IGNORE INTO customers (id, name, email, phone, address, notes, directory, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                cursor.executemany(query, rows)
+                added_count = cursor.rowcount
+                if added_count > 0:
+                     # Log audit event (same transaction as the inserts)
+                     self.data_manager.log_audit_event(
+                         action="CUSTOMER_ADD_MULTI",
+                         details={"count": added_count, "skipped": len(rows) - added_count},
+                         commit=False
+                     )
+                conn.commit()
+                logging.info(f"Added {added_count} of {len(rows)} customers.")
+
+            except sqlite3.Error as e:
+                logging.error(f"Database error adding multiple customers: {e}")
+                try: conn.rollback()
+                except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
+                raise DatabaseError(f"Error adding customers: {e}") from e
+
+        return added_count
+
+
     def update_customer(self, customer_id, **updates):
         """
-        Update an existing customer in the database.
-        Returns: bool: True on success.
+        Update an existing customer in the database. Fields already holding the given values are not written.
+        Returns: bool: True on success (including when nothing changed), False if the customer doesn't exist.
         Raises: DatabaseError: If a database error occurs.
                 ValidationError: If customer_id or updates are missing.
         """
         if not customer_id or not updates:
              raise ValidationError("Customer ID and update data are required for update.")
 
-        set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
-        params = list(updates.values())
-        params.append(customer_id)
-        query = f"UPDATE customers SET {set_clause} WHERE id = ?"
-
         try:
-            success = self._execute_query(query, tuple(params), commit=True)
+            with self.data_manager.connection() as conn:
+                # Read under the same lock as the write, then write (and audit) only the fields that differ
+                current = self.get_customer_by_id(customer_id)
+                if not current:
+                     logging.warning(f"Attempted to update non-existent customer ID: {customer_id}")
+                     return False
+                updates = {key: value for key, value in updates.items() if current.get(key) != value}
+                if not updates:
+                     logging.info(f"Update skipped for customer {customer_id}, no field changed.")
+                     return True # Considered success as the state is correct
+
+                set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
+                query = f"UPDATE customers SET {set_clause} WHERE id = ?"
+                success = self._execute_query(query, (*updates.values(), customer_id))
+                if success:
+                     # Log audit event in the update's transaction
+                     self.data_manager.log_audit_event(
+                         action="CUSTOMER_UPDATE",
+                         target_id=customer_id,
+                         details={"updated_fields": list(updates.keys())}, # Log which fields were updated
+                         commit=False
+                     )
+                     self._commit(conn)
             if success:
                  logging.info(f"Updated customer with ID {customer_id}.")
-                 # Log audit event
-                 self.data_manager.log_audit_event(
-                     action="CUSTOMER_UPDATE",
-                     target_id=customer_id,
-                     details={"updated_fields": list(updates.keys())} # Log which fields were updated
-                 )
                  return True
             logging.warning(f"Update query for customer {customer_id} reported no error but returned False.")
             return False
@@ -177,15 +274,19 @@ class CustomerOperations:
         params = (customer_id,)
 
         try:
-            success = self._execute_query(query, params, commit=True)
+            with self.data_manager.connection() as conn:
+                success = self._execute_query(query, params)
+                if success:
+                    # Log audit event in the delete's transaction
+                    self.data_manager.log_audit_event(
+                        action="CUSTOMER_DELETE",
+                        target_id=customer_id,
+                        details=details_for_log,
+                        commit=False
+                    )
+                    self._commit(conn)
             if success:
                 logging.info(f"Deleted customer with ID {customer_id}.")
-                # Log audit event
-                self.data_manager.log_audit_event(
-                    action="CUSTOMER_DELETE",
-                    target_id=customer_id,
-                    details=details_for_log
-                )
                 return True
             logging.warning(f"Delete query for customer {customer_id} reported no error but returned False.")
             return False
@@ -202,40 +303,86 @@ class CustomerOperations:
         if not customer_ids:
             return 0
 
-        conn = self.data_manager._get_db_connection()
-        if not conn:
-             raise DatabaseError("Failed to establish database connection.")
+        with self.data_manager.connection() as conn:
+            if not conn:
+                 raise DatabaseError("Failed to establish database connection.")
 
-        deleted_count = 0
-        try:
-            cursor = conn.cursor()
-            placeholders = ','.join('?' for _ in customer_ids)
-            query = f"DELETE FROM customers WHERE id IN ({placeholders})"
-            
-            cursor.execute(query, tuple(customer_ids))
-            deleted_count = cursor.rowcount
-            conn.commit()
-            logging.info(f"Deleted {deleted_count} customers.")
-            if deleted_count > 0:
-                 # Log audit event
-                 self.data_manager.log_audit_event(
-                     action="CUSTOMER_DELETE_MULTI",
-                     details={"deleted_ids": customer_ids, "count": deleted_count}
-                 )
-
-        except sqlite3.Error as e:
-            logging.error(f"Database error deleting multiple customers: {e}")
-            try: conn.rollback()
-            except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
             deleted_count = 0
-            raise DatabaseError(f"Error deleting customers: {e}") from e
-        finally:
-            if conn:
-                conn.close()
+            try:
+                cursor = conn.cursor()
+                # IDs are bound as one JSON array, so the statement text (and SQLite's cached plan)
+                # is the same for any selection size and never hits the bound-variable limit
+                query = "DELETE FROM customers WHERE id IN (SELECT value FROM json_each(?))"
+
+                cursor.execute(query, (_json_id_array(customer_ids),))
+                deleted_count = cursor.rowcount
+                if deleted_count > 0:
+                     # Log audit event (same transaction as the delete)
+                     self.data_manager.log_audit_event(
+                         action="CUSTOMER_DELETE_MULTI",
+                         details={"deleted_ids": customer_ids, "count": deleted_count},
+                         commit=False
+                     )
+                conn.commit()
+                logging.info(f"Deleted {deleted_count} customers.")
+
+            except sqlite3.Error as e:
+                logging.error(f"Database error deleting multiple customers: {e}")
+                try: conn.rollback()
+                except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
+                deleted_count = 0
+                raise DatabaseError(f"Error deleting customers: {e}") from e
         
         return deleted_count
 
 
+    def update_multiple_customers(self, customer_ids, **updates):
+        """
+        Apply the same field updates to multiple customers in a single statement.
+        Returns: int: The number of customers updated.
+        Raises: ValidationError: If updates are missing or name a field that can't be batch updated.
+                DatabaseError: If a database error occurs during the transaction.
+        """
+        if not customer_ids:
+            return 0
+        if not updates:
+            raise ValidationError("Update data is required for batch update.")
+        invalid_fields = set(updates) - BATCH_UPDATABLE_FIELDS
+        if invalid_fields:
+            raise ValidationError(f"Fields cannot be batch updated: {', '.join(sorted(invalid_fields))}")
+
+        with self.data_manager.connection() as conn:
+            if not conn:
+                 raise DatabaseError("Failed to establish database connection.")
+
+            updated_count = 0
+            try:
+                cursor = conn.cursor()
+                set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
+                # IDs bound as one JSON array, as in delete_multiple_customers
+                query = f"UPDATE customers SET {set_clause} WHERE id IN (SELECT value FROM json_each(?))"
+
+                cursor.execute(query, (*updates.values(), _json_id_array(customer_ids)))
+                updated_count = cursor.rowcount
+                if updated_count > 0:
+                     # Log audit event (same transaction as the update)
+                     self.data_manager.log_audit_event(
+                         action="CUSTOMER_UPDATE_MULTI",
+                         details={"updated_ids": list(customer_ids), "updated_fields": list(updates.keys()), "count": updated_count},
+                         commit=False
+                     )
+                conn.commit()
+                logging.info(f"Updated {updated_count} customers.")
+
+            except sqlite3.Error as e:
+                logging.error(f"Database error updating multiple customers: {e}")
+                try: conn.rollback()
+                except Exception as rb_e: logging.error(f"Rollback failed: {rb_e}")
+                raise DatabaseError(f"Error updating customers: {e}") from e
+
+        return updated_count
+
+
     def rename_customer(self, customer_id, new_name):
         """
         Rename a customer by ID in the database.
@@ -267,15 +414,19 @@ class CustomerOperations:
         params = (new_name, customer_id)
 
         try:
-            success = self._execute_query(query, params, commit=True)
+            with self.data_manager.connection() as conn:
+                success = self._execute_query(query, params)
+                if success:
+                    # Log audit event in the rename's transaction
+                    self.data_manager.log_audit_event(
+                        action="CUSTOMER_RENAME",
+                        target_id=customer_id,
+                        details={"old_name": old_name, "new_name": new_name},
+                        commit=False
+                    )
+                    self._commit(conn)
             if success:
                 logging.info(f"Renamed customer {customer_id} from '{old_name}' to '{new_name}'.")
-                # Log audit event
-                self.data_manager.log_audit_event(
-                    action="CUSTOMER_RENAME",
-                    target_id=customer_id,
-                    details={"old_name": old_name, "new_name": new_name}
-                )
                 return True
             logging.warning(f"Rename query for customer {customer_id} reported no error but returned False.")
             return False
@@ -337,7 +488,6 @@ class CustomerOperations:
         dialog.title("Rename Customer")
         dialog.geometry("400x150")
         dialog.transient(self.parent.root)
-        dialog.grab_set()
         name_frame = ttk.Frame(dialog); name_frame.pack(fill='x', padx=20, pady=20)
         ttk.Label(name_frame, text="New Name:").pack(side='left', padx=(0, 10))
         name_var = tk.StringVar(value=current_name)
@@ -351,7 +501,8 @@ class CustomerOperations:
             try:
                 if self.rename_customer(customer_id, new_name): # This now raises exceptions
                     dialog.destroy()
-                    self.parent.refresh_customer_list()
+                    self.parent._index_update([customer_id], {"name": new_name})
+                    self.parent._refresh_customer_views()
                     if hasattr(self.data_manager, 'update_status'):
                          self.data_manager.update_status(f"Customer renamed to '{new_name}'.")
             except ValidationError as ve: messagebox.showerror("Validation Error", str(ve), parent=dialog)
@@ -367,11 +518,13 @@ class CustomerOperations:
         x = self.parent.root.winfo_x() + (self.parent.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
         y = self.parent.root.winfo_y() + (self.parent.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
         dialog.geometry(f"+{x}+{y}")
+        dialog.wait_visibility()
+        dialog.grab_set()
 
 
     def export_customers_to_csv(self, customers, filepath=None):
         """
-        Export customers (list of dicts) to CSV file.
+        Export customers (iterable of dicts) to CSV file, streaming rows through a buffered writer.
         Returns: bool: True on success.
         Raises: FilesystemError: If file writing fails.
                 ValidationError: If filepath is not provided and cannot be obtained.
@@ -382,12 +535,12 @@ class CustomerOperations:
              if not filepath: raise ValidationError("Export cancelled by user.")
 
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                headers = ["id", "name", "email", "phone", "address", "notes", "directory", "created_at"]
-                writer = csv.DictWriter(f, fieldnames=headers, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(customers)
-            logging.info(f"Exported {len(customers)} customers to CSV: {filepath}")
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(CUSTOMER_EXPORT_FIELDS)
+                # Plain row tuples skip DictWriter's per-row key checks; missing keys (None) are written empty
+                writer.writerows(tuple(map(customer.get, CUSTOMER_EXPORT_FIELDS)) for customer in customers)
+            logging.info(f"Exported customers to CSV: {filepath}")
             return True
         except IOError as e:
             logging.error(f"Failed to write CSV file '{filepath}': {e}")
@@ -399,7 +552,7 @@ class CustomerOperations:
 
     def export_customers_to_json(self, customers, filepath=None):
         """
-        Export customers (list of dicts) to JSON file.
+        Export customers (iterable of dicts) to JSON file, writing one array element at a time.
         Returns: bool: True on success.
         Raises: FilesystemError: If file writing fails.
                 ValidationError: If filepath is not provided and cannot be obtained.
@@ -410,9 +563,68 @@ class CustomerOperations:
              if not filepath: raise ValidationError("Export cancelled by user.")
 
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(customers, f, indent=4)
-            logging.info(f"Exported {len(customers)} customers to JSON: {filepath}")
+            # Both paths write the same file: a 2-space indent (the only one orjson offers) and raw
+            # UTF-8 rather than \uXXXX escapes, i.e. json.dump(customers, f, indent=2, ensure_ascii=False)
+            count = 0
+            if orjson:
+                # orjson returns UTF-8 bytes directly
+                with open(filepath, 'wb', buffering=EXPORT_BUFFER_SIZE) as f:
+                    f.write(b"[")
+                    for customer in customers:
+                        f.write(b",\n  " if count else b"\n  ")
+                        f.write(orjson.dumps(customer, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  "))
+                        count += 1
+                    f.write(b"\n]" if count else b"]")
+            else:
+                # newline='' keeps '\n' line endings on Windows too, as in orjson's bytes
+                with open(filepath, 'w', encoding='utf-8', newline='', buffering=EXPORT_BUFFER_SIZE) as f:
+                    # Element by element, so no list of all customers is needed
+                    f.write("[")
+                    for customer in customers:
+                        f.write(",\n  " if count else "\n  ")
+                        f.write(json.dumps(customer, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+                        count += 1
+                    f.write("\n]" if count else "]")
+            logging.info(f"Exported {count} customers to JSON: {filepath}")
+            return True
+        except IOError as e:
+            logging.error(f"Failed to write JSON file '{filepath}': {e}")
+            raise FilesystemError(f"Failed to export to JSON: {e}") from e
+        except Exception as e:
+            logging.error(f"Unexpected error exporting to JSON '{filepath}': {e}", exc_info=True)
+            raise FilesystemError(f"Unexpected error exporting to JSON: {e}") from e
+
+
+    def export_customers_to_json_columnar(self, customers, filepath=None):
+        """
+        Export customers (iterable of dicts) to JSON as {"columns": {field: [values...]}},
+        so each field name is written once instead of once per customer.
+        Returns: bool: True on success.
+        Raises: FilesystemError: If file writing fails.
+                ValidationError: If filepath is not provided and cannot be obtained.
+        """
+        if not filepath:
+             if not self.parent or not self.parent.root: raise ValidationError("Filepath required for export, and UI context unavailable to ask.")
+             filepath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")], parent=self.parent.root)
+             if not filepath: raise ValidationError("Export cancelled by user.")
+
+        columns = {field: [] for field in CUSTOMER_EXPORT_FIELDS}
+        appenders = [(column.append, field) for field, column in columns.items()]
+        count = 0
+        for customer in customers:
+            for append, field in appenders:
+                append(customer.get(field))
+            count += 1
+
+        try:
+            if orjson:
+                with open(filepath, 'wb') as f:
+                    f.write(orjson.dumps({"columns": columns}))
+            else:
+                with open(filepath, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+                    # Compact, raw UTF-8 output, byte-identical to orjson's
+                    json.dump({"columns": columns}, f, separators=(",", ":"), ensure_ascii=False)
+            logging.info(f"Exported {count} customers to columnar JSON: {filepath}")
             return True
         except IOError as e:
             logging.error(f"Failed to write JSON file '{filepath}': {e}")
@@ -435,13 +647,29 @@ class CustomerOperations:
         Raises: FilesystemError: If directory creation fails or already exists.
                 ValidationError: If user cancels or provides invalid input.
         """
+        return self.make_directory(self.ask_new_directory(suggested_name))
+
+    def ask_new_directory(self, suggested_name="new_customer"):
+        """
+        Ask for a parent directory and a name for a new customer directory. (UI-dependent)
+        Returns: str: The path to create; nothing is created yet (see make_directory).
+        Raises: FilesystemError: If there is no UI context.
+                ValidationError: If user cancels or provides invalid input.
+        """
         if not self.parent or not self.parent.root: raise FilesystemError("Cannot create directory without UI context.")
         parent_dir = filedialog.askdirectory(title="Select Parent Directory for Customer Folders", parent=self.parent.root)
         if not parent_dir: raise ValidationError("Directory creation cancelled: No parent directory selected.")
-        suggested_name = "".join(c if c.isalnum() else "_" for c in suggested_name).replace("__", "_")
+        suggested_name = _UNSAFE_DIR_NAME_CHAR.sub("_", suggested_name).replace("__", "_")
         dir_name = simpledialog.askstring("Directory Name", "Enter name for the customer directory:", initialvalue=suggested_name, parent=self.parent.root)
         if not dir_name: raise ValidationError("Directory creation cancelled: No directory name entered.")
-        new_dir = os.path.join(parent_dir, dir_name)
+        return os.path.join(parent_dir, dir_name)
+
+    def make_directory(self, new_dir):
+        """
+        Create new_dir (and any missing parents). No UI calls, so it can run on a worker thread.
+        Returns: str: new_dir.
+        Raises: FilesystemError: If the directory already exists or cannot be created.
+        """
         if os.path.exists(new_dir): raise FilesystemError(f"Directory '{new_dir}' already exists.")
         try:
             os.makedirs(new_dir)
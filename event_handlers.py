@@ -16,6 +16,11 @@ except ImportError:
     class DatabaseError(CustomerOpsError): pass
     class FilesystemError(CustomerOpsError): pass
 
+# The customer treeview is filled in chunks: the first one (more than a screenful) synchronously,
+# the rest from the Tk event loop so the window stays responsive on large customer lists
+CUSTOMER_TREE_FIRST_CHUNK = 200
+CUSTOMER_TREE_CHUNK = 500
+
 
 class EventHandlers:
     """Handles various UI event handling for the Customer Manager application"""
@@ -25,6 +30,9 @@ class EventHandlers:
         self.parent = parent
         self.context_menu = None
         self.case_context_menu = None
+        self._populate_job = None # Pending root.after() id while the customer tree is being filled
+        self._customer_tree_loaded = False # The customer tree is first filled when its tab is shown
+        self._templates_tab_loaded = False # Template and custom field trees are filled on first view
 
     # --- Customer Search and Tree ---
     def on_search_changed(self, *args):
@@ -32,12 +40,14 @@ class EventHandlers:
         search_input = self.parent.search_var.get().lower()
         search_terms = search_input.split() # Split by space for multiple terms
         search_field = self.parent.search_field_var.get()
-        logging.debug(f"Search changed: input='{search_input}', terms={search_terms}, field='{search_field}'")
+        logging.debug("Search changed: input='%s', terms=%s, field='%s'", search_input, search_terms, search_field)
 
-        for item in self.parent.customer_tree.get_children():
-            self.parent.customer_tree.delete(item)
+        if self._populate_job is not None:
+            self.parent.root.after_cancel(self._populate_job)
+            self._populate_job = None
+        self.parent.customer_tree.delete(*self.parent.customer_tree.get_children())
+        self._customer_tree_loaded = True
 
-        count = 0
         customers_to_display = []
         if not search_terms: # If no search terms, display all
             customers_to_display = self.parent.customers
@@ -70,22 +80,47 @@ class EventHandlers:
                      customers_to_display.append(customer)
 
         # Populate the treeview with filtered results
-        for customer in customers_to_display:
-            self.add_customer_to_tree(customer)
-            count += 1
-            
-        logging.debug(f"Populated customer treeview with {count} items after search.")
+        count = len(customers_to_display)
+        self._populate_customer_tree(customers_to_display)
+
+        logging.debug("Populated customer treeview with %d items after search.", count)
         status_msg = f"Showing {count} of {len(self.parent.customers)} customers."
         if search_terms: status_msg = f"Found {count} customers matching '{search_input}'."
         self.parent.status_var.set(status_msg)
 
 
-    def add_customer_to_tree(self, customer):
-        """Add a customer dictionary (from DB) to the treeview."""
+    def _populate_customer_tree(self, customers, start=0):
+        """Insert customers[start:] into the treeview one chunk per call, scheduling the next chunk via root.after()."""
+        end = start + (CUSTOMER_TREE_FIRST_CHUNK if start == 0 else CUSTOMER_TREE_CHUNK)
+        # Customers edited or deleted since the search ran are taken from (or dropped by) the live index
+        by_id = self.parent.customers_by_id
+        tree = self.parent.customer_tree
+        # Issue the Tcl insert command directly: one call per row without Treeview.insert's option formatting
+        tcl_call, tree_path = tree.tk.call, tree._w
+        for customer in customers[start:end]:
+            current = by_id.get(customer.get('id')) if isinstance(customer, dict) else None
+            if current is None: continue
+            try:
+                tcl_call(tree_path, 'insert', '', 'end', '-id', current['id'], '-values', self._customer_tree_values(current))
+            except tk.TclError as e: logging.error(f"Failed to insert customer {current['id']} into tree: {e}")
+        if end < len(customers):
+            self._populate_job = self.parent.root.after(1, self._populate_customer_tree, customers, end)
+        else:
+            self._populate_job = None
+
+    def add_customer_to_tree(self, customer, index='end'):
+        """Add a customer dictionary (from DB) to the treeview at index (default: last row)."""
         if not isinstance(customer, dict) or 'id' not in customer:
              logging.warning(f"add_customer_to_tree called with invalid data: {customer}")
              return
 
+        try:
+            self.parent.customer_tree.insert('', index, iid=customer.get('id'), values=self._customer_tree_values(customer))
+        except tk.TclError as e: logging.error(f"Failed to insert customer {customer.get('id')} into tree: {e}")
+
+    @staticmethod
+    def _customer_tree_values(customer):
+        """Column values (id, name, email, phone, directory, created) of a customer's treeview row."""
         created_at = customer.get('created_at', '')
         created_display = ''
         if created_at:
@@ -93,22 +128,29 @@ class EventHandlers:
                 dt = datetime.fromisoformat(created_at)
                 created_display = dt.strftime('%Y-%m-%d %H:%M')
             except (ValueError, TypeError): created_display = str(created_at)
-
-        try:
-            self.parent.customer_tree.insert(
-                '', 'end', iid=customer.get('id'),
-                values=(
-                    customer.get('id', ''), customer.get('name', ''), customer.get('email', ''),
-                    customer.get('phone', ''), customer.get('directory', ''), created_display
-                )
-            )
-        except tk.TclError as e: logging.error(f"Failed to insert customer {customer.get('id')} into tree: {e}")
+        return (
+            customer.get('id', ''), customer.get('name', ''), customer.get('email', ''),
+            customer.get('phone', ''), customer.get('directory', ''), created_display
+        )
 
     # --- Case Folder Filtering and Tree ---
     def on_case_filter_changed(self, *args):
         """Filter case folders based on filter text by refreshing the list."""
         self.parent.refresh_case_list()
 
+    # --- Notebook ---
+    def on_notebook_tab_changed(self, event=None):
+        """Fill the Manage Customers and Manage Templates tabs' treeviews the first time each is shown."""
+        selected_tab = self.parent.notebook.select()
+        if selected_tab == str(self.parent.manage_customers_tab):
+            if not self._customer_tree_loaded:
+                self.parent.treeview_manager.refresh_customer_list()
+        elif selected_tab == str(self.parent.manage_templates_tab):
+            if not self._templates_tab_loaded:
+                self._templates_tab_loaded = True
+                self.refresh_template_list()
+                self.refresh_custom_field_definitions_list()
+
     # --- Template Management ---
     def refresh_template_list(self):
         """Reload templates from DB and refresh the template treeview."""
@@ -140,7 +182,7 @@ class EventHandlers:
         selected_template = next((t for t in self.parent.templates if t.get('id') == template_id), None)
         
         if selected_template:
-            logging.debug(f"Template selected: {selected_template.get('name')} (ID: {template_id})")
+            logging.debug("Template selected: %s (ID: %s)", selected_template.get('name'), template_id)
             self.parent.template_form_id_var.set(selected_template.get('id', ''))
             self.parent.template_form_name_var.set(selected_template.get('name', ''))
             self.parent.template_form_desc_var.set(selected_template.get('description', ''))
@@ -308,19 +350,18 @@ class EventHandlers:
         field_def_id = selected_items[0]
         
         # Find the selected definition data
-        conn = self.parent.data_manager._get_db_connection()
         selected_definition = None
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM custom_field_definitions WHERE id = ?", (field_def_id,))
-                row = cursor.fetchone()
-                if row: selected_definition = dict(row)
-            except Exception as e: logging.error(f"Error fetching selected custom field definition {field_def_id}: {e}")
-            finally: conn.close()
+        with self.parent.data_manager.connection() as conn:
+            if conn:
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT * FROM custom_field_definitions WHERE id = ?", (field_def_id,))
+                    row = cursor.fetchone()
+                    if row: selected_definition = dict(row)
+                except Exception as e: logging.error(f"Error fetching selected custom field definition {field_def_id}: {e}")
 
         if selected_definition:
-            logging.debug(f"Custom field selected: {selected_definition.get('name')}")
+            logging.debug("Custom field selected: %s", selected_definition.get('name'))
             self.parent.cf_form_name_var.set(selected_definition.get('name', ''))
             self.parent.cf_form_label_var.set(selected_definition.get('label', ''))
             self.parent.cf_form_type_var.set(selected_definition.get('field_type', ''))
@@ -474,10 +515,10 @@ class EventHandlers:
         selected_items = self.parent.customer_tree.selection()
         if selected_items:
             customer_id = selected_items[0]
-            customer_name = self.parent.customer_tree.item(customer_id, "values")[1]
+            customer_name = self.parent.customer_tree.set(customer_id, "name")
             self.parent.selected_customer_var.set(customer_name)
             self.parent.selected_customer_id_var.set(customer_id)
-            logging.debug(f"Customer selected for case tab: {customer_name} (ID: {customer_id})")
+            logging.debug("Customer selected for case tab: %s (ID: %s)", customer_name, customer_id)
             self.parent.refresh_case_list()
         else:
              logging.debug("No customer selected, clearing case tab selection.")
@@ -514,14 +555,16 @@ class EventHandlers:
         if iid:
             if iid not in self.parent.case_tree.selection(): self.parent.case_tree.selection_set(iid)
             self.parent.selected_case_id_var.set(iid)
-            logging.debug(f"Context menu shown for case ID: {iid}")
+            logging.debug("Context menu shown for case ID: %s", iid)
             try: self.case_context_menu.tk_popup(event.x_root, event.y_root)
             finally: self.case_context_menu.grab_release()
 
     def open_selected_case_folder_from_context(self):
          case_id = self.parent.selected_case_id_var.get()
          if case_id:
-             try: self.parent.case_ops.open_case_folder(case_id)
+             case_tree = self.parent.case_tree
+             case_path = case_tree.set(case_id, "path") if case_tree.exists(case_id) else None
+             try: self.parent.case_ops.open_case_folder(case_id, case_path)
              except (ValidationError, DatabaseError, FilesystemError) as e:
                   logging.error(f"Error opening case folder from context menu: {e}")
                   messagebox.showerror("Error", str(e), parent=self.parent.root)
@@ -535,10 +578,10 @@ class EventHandlers:
         selected_items = self.parent.customer_tree.selection()
         if selected_items:
             customer_id = selected_items[0]
-            customer_name = self.parent.customer_tree.item(customer_id, "values")[1]
+            customer_name = self.parent.customer_tree.set(customer_id, "name")
             self.parent.selected_customer_id_var.set(customer_id)
             self.parent.selected_customer_var.set(customer_name)
-            logging.debug(f"Customer selected: {customer_name} (ID: {customer_id})")
+            logging.debug("Customer selected: %s (ID: %s)", customer_name, customer_id)
             self.parent.status_var.set(f"Selected customer: {customer_name}")
             self.parent.refresh_case_list()
         else:
@@ -551,9 +594,9 @@ class EventHandlers:
         selected_items = self.parent.case_tree.selection()
         if selected_items:
             case_id = selected_items[0]
-            case_number = self.parent.case_tree.item(case_id, "values")[1]
+            case_number = self.parent.case_tree.set(case_id, "case")
             self.parent.selected_case_id_var.set(case_id)
-            logging.debug(f"Case selected: {case_number} (ID: {case_id})")
+            logging.debug("Case selected: %s (ID: %s)", case_number, case_id)
             self.parent.status_var.set(f"Selected case folder: {case_number}")
         else:
              self.parent.selected_case_id_var.set("")
@@ -562,13 +605,18 @@ class EventHandlers:
     # --- Dropdown Selection Handler ---
     def on_customer_dropdown_selected(self, event):
         customer_name = self.parent.selected_customer_var.get()
-        customer_id = None
-        logging.debug(f"Customer dropdown selected: '{customer_name}'")
-        for customer in self.parent.customers:
-            if customer.get("name") == customer_name: customer_id = customer.get("id"); break
+        logging.debug("Customer dropdown selected: '%s'", customer_name)
+        # The dropdown lists self.parent.customers in order, so the selected index usually names the
+        # customer directly; scan by name only if the cache has changed since the list was filled
+        index = self.parent.customer_dropdown.current()
+        customers = self.parent.customers
+        if 0 <= index < len(customers) and customers[index].get("name") == customer_name:
+            customer_id = customers[index].get("id")
+        else:
+            customer_id = next((c.get("id") for c in customers if c.get("name") == customer_name), None)
         if customer_id:
             self.parent.selected_customer_id_var.set(customer_id)
-            logging.debug(f"Found customer ID: {customer_id}")
+            logging.debug("Found customer ID: %s", customer_id)
             self.parent.refresh_case_list()
             self.parent.status_var.set(f"Loaded cases for: {customer_name}")
         else:
@@ -598,6 +646,9 @@ class EventHandlers:
              self.parent.custom_field_tree.bind('<<TreeviewSelect>>', self.on_custom_field_tree_selected)
 
 
+        # Populate the Manage Customers and Manage Templates tabs lazily, on first selection
+        self.parent.notebook.bind("<<NotebookTabChanged>>", self.on_notebook_tab_changed)
+
         # Dropdown selections
         self.parent.customer_dropdown.bind("<<ComboboxSelected>>", self.on_customer_dropdown_selected)
         if self.parent.template_dropdown:
@@ -69,9 +69,11 @@ class FormManager:
             # Switch to the manage tab
             self.parent.notebook.select(self.parent.manage_customers_tab)
             
-            # Refresh customer list
-            self.parent.refresh_customer_list()
+            # Add the new customer to the cached list and show its row (no full DB reload or redraw)
+            index = self.parent._index_add(result)
+            self.parent.treeview_manager.add_customer(result, index)
+            self.parent.dropdown_manager.update_customer_dropdown()
             
-            return True
+            return result
         
         return False
@@ -1,49 +1,40 @@
 import pytest
-import sqlite3
 import os
-import uuid
+import errno
 from datetime import datetime
-import builtins # For mocking open
-import json # Added import
-from unittest.mock import patch, MagicMock, mock_open # For mocking filesystem/open
+import json
 
 # Modules to test
 from data_manager import DataManager
-from customer_operations import CustomerOperations
-from case_folder_operations import CaseFolderOperations
+from customer_operations import CustomerOperations, ValidationError, DatabaseError, FilesystemError
+import case_folder_operations
+from case_folder_operations import CaseFolderOperations, _move_folder
 
 # --- Test Fixtures (Similar to test_customer_operations) ---
 
 class DummyParent:
-    def __init__(self, data_manager_instance, customer_ops_instance):
+    def __init__(self, data_manager_instance, customer_ops_instance=None):
         self.data_manager = data_manager_instance
         self.customer_ops = customer_ops_instance # CaseFolderOps needs customer_ops
         self.root = None
 
 @pytest.fixture
-def in_memory_db():
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    # Create schema
-    cursor = conn.cursor()
-    cursor.execute("CREATE TABLE customers (id TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT, phone TEXT, address TEXT, notes TEXT, directory TEXT UNIQUE, created_at TEXT NOT NULL)")
-    cursor.execute("CREATE TABLE templates (id TEXT PRIMARY KEY, name TEXT NOT NULL UNIQUE, description TEXT, folders TEXT NOT NULL)")
-    cursor.execute("CREATE TABLE case_folders (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id TEXT NOT NULL, case_number TEXT NOT NULL, description TEXT, path TEXT NOT NULL UNIQUE, created_at TEXT NOT NULL, FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE CASCADE)")
-    conn.commit()
-    yield conn
-    conn.close()
-
-@pytest.fixture
-def test_data_manager(in_memory_db):
+def test_data_manager(tmp_path):
+    """DataManager on a real SQLite file in tmp_path, with the application's own schema (incl. audit_log and indexes)."""
     class TestDataManager(DataManager):
         def __init__(self, parent):
+            # Skip the worker thread and JSON migration; only the schema is needed
             self.parent = parent
-            self.db_file = ":memory:"
-        def _get_db_connection(self):
-            return in_memory_db # Use the fixture's connection
+            self.db_file = str(tmp_path / "test_customer_data.db")
+            self._initialize_database()
     dm = TestDataManager(parent=None)
-    return dm
+    yield dm
+    dm.close_db()
+
+@pytest.fixture
+def db_conn(test_data_manager):
+    """The test DataManager's shared connection, for checking and seeding rows directly."""
+    return test_data_manager._get_db_connection()
 
 @pytest.fixture
 def test_customer_ops(test_data_manager):
@@ -61,110 +52,158 @@ def case_folder_ops(test_data_manager, test_customer_ops):
     return ops
 
 @pytest.fixture
-def sample_customer(test_customer_ops):
+def make_customer(test_customer_ops, tmp_path):
+    """Factory adding a customer whose directory exists under tmp_path."""
+    def _make(name):
+        directory = tmp_path / "customers" / name.replace(" ", "_")
+        directory.mkdir(parents=True)
+        customer = test_customer_ops.add_customer(name, f"{name}@test.com", "", "", "", str(directory))
+        assert customer is not None
+        return customer
+    return _make
+
+@pytest.fixture
+def sample_customer(make_customer):
     """Fixture to add a sample customer to the DB for testing case folders."""
-    customer_data = test_customer_ops.add_customer(
-        name="Case Test Customer",
-        email="case@test.com",
-        phone="555-CASE",
-        address="456 Case Ave",
-        notes="Customer for case tests",
-        directory="/fake/customer/case_test_customer" # Use a fake path
-    )
-    assert customer_data is not None
-    return customer_data
+    return make_customer("Case Test Customer")
 
 @pytest.fixture
-def sample_template(test_data_manager):
+def sample_template(db_conn):
     """Fixture to add a sample template to the DB."""
     template_data = {
         "id": "case_test_template",
         "name": "Case Test Template",
         "description": "Template for testing cases",
-        "folders": ["FolderA", "FolderB"]
+        "folders": ["FolderA", "FolderB/Drafts"]
     }
-    # Use DataManager's add_template (or direct insert for simplicity in test)
-    conn = test_data_manager._get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO templates (id, name, description, folders) VALUES (?, ?, ?, ?)",
-                   (template_data['id'], template_data['name'], template_data['description'], json.dumps(template_data['folders'])))
-    conn.commit()
+    db_conn.execute("INSERT INTO templates (id, name, description, folders) VALUES (?, ?, ?, ?)",
+                    (template_data['id'], template_data['name'], template_data['description'], json.dumps(template_data['folders'])))
+    db_conn.commit()
     return template_data
 
+def add_case_row(db_conn, customer_id, case_number, description, path):
+    """Insert a case_folders row directly and return its ID."""
+    cursor = db_conn.execute("INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (customer_id, case_number, description, path, datetime.now().isoformat()))
+    db_conn.commit()
+    return cursor.lastrowid
+
+def block_writes(db_conn, operation):
+    """Make every INSERT or UPDATE on case_folders fail, to exercise the database-failure paths."""
+    db_conn.execute(f"CREATE TEMP TRIGGER block_case_{operation.lower()} BEFORE {operation} ON case_folders "
+                    "BEGIN SELECT RAISE(ABORT, 'write blocked by test'); END")
+
 
 # --- Test Cases ---
 
-@patch('os.path.exists')
-@patch('os.makedirs')
-@patch('builtins.open', new_callable=mock_open)
-def test_create_case_folder_success(mock_file_open, mock_makedirs, mock_exists, case_folder_ops, sample_customer, sample_template, in_memory_db):
+def test_create_case_folder_success(case_folder_ops, sample_customer, sample_template, db_conn):
     """Test successful creation of a case folder."""
     customer_id = sample_customer['id']
     customer_dir = sample_customer['directory']
     case_number = "MS12345"
     description = "Test Case Description"
-    expected_folder_name = f"{case_number}_{description.replace(' ', '_')}"
-    expected_path = os.path.join(customer_dir, expected_folder_name)
-
-    # Mock filesystem checks: directory exists, case folder does NOT exist initially
-    mock_exists.side_effect = lambda path: path == customer_dir # Only customer dir exists
+    expected_path = os.path.join(customer_dir, f"{case_number}_{description}")
 
     success = case_folder_ops.create_case_folder(customer_id, case_number, description, sample_template)
 
     assert success is True
-    # Check if os.makedirs was called correctly
-    mock_makedirs.assert_any_call(expected_path) # Main folder
-    mock_makedirs.assert_any_call(os.path.join(expected_path, "FolderA"), exist_ok=True) # Subfolders
-    mock_makedirs.assert_any_call(os.path.join(expected_path, "FolderB"), exist_ok=True)
-    # Check if case_info.txt was opened for writing
-    mock_file_open.assert_called_once_with(os.path.join(expected_path, "case_info.txt"), 'w')
-
-    # Verify DB record
-    cursor = in_memory_db.cursor()
-    cursor.execute("SELECT * FROM case_folders WHERE customer_id = ? AND case_number = ?", (customer_id, case_number))
-    row = cursor.fetchone()
+    # Main folder and template subfolders, including the intermediate folder of a nested entry
+    assert os.path.isdir(expected_path)
+    assert os.path.isdir(os.path.join(expected_path, "FolderA"))
+    assert os.path.isdir(os.path.join(expected_path, "FolderB", "Drafts"))
+    with open(os.path.join(expected_path, "case_info.txt")) as f:
+        info = f.read()
+    assert f"Case Number: {case_number}\n" in info
+    assert f"Customer ID: {customer_id}\n" in info
+    assert f"Customer Name: {sample_customer['name']}\n" in info
+    assert "Template: Case Test Template\n" in info
+
+    # Verify DB record and its audit entry
+    row = db_conn.execute("SELECT * FROM case_folders WHERE customer_id = ? AND case_number = ?", (customer_id, case_number)).fetchone()
     assert row is not None
     assert dict(row)['description'] == description
     assert dict(row)['path'] == expected_path
+    audit = db_conn.execute("SELECT target_id FROM audit_log WHERE action = 'CASE_ADD'").fetchone()
+    assert audit['target_id'] == str(row['id'])
+
+def test_create_case_folder_sanitizes_description(case_folder_ops, sample_customer):
+    """Unsafe and non-ASCII characters in the description collapse to single underscores."""
+    case_folder_ops.create_case_folder(sample_customer['id'], "MS2", "Résumé: a/b__c", None)
+    assert os.listdir(sample_customer['directory']) == ["MS2_R_sum_ a_b_c"]
 
-@patch('os.path.exists')
-def test_create_case_folder_customer_dir_not_found(mock_exists, case_folder_ops, sample_customer):
+def test_create_case_folder_customer_dir_not_found(case_folder_ops, sample_customer):
     """Test creating case folder when customer directory doesn't exist."""
-    customer_id = sample_customer['id']
-    mock_exists.return_value = False # Simulate customer directory not existing
+    os.rmdir(sample_customer['directory'])
 
-    success = case_folder_ops.create_case_folder(customer_id, "MS999", "Test", None)
-    assert success is False
+    with pytest.raises(FilesystemError):
+        case_folder_ops.create_case_folder(sample_customer['id'], "MS999", "Test", None)
 
-@patch('os.path.exists')
-def test_create_case_folder_already_exists(mock_exists, case_folder_ops, sample_customer):
+def test_create_case_folder_already_exists(case_folder_ops, sample_customer, db_conn):
     """Test creating case folder when it already exists on filesystem."""
-    customer_id = sample_customer['id']
-    customer_dir = sample_customer['directory']
-    case_number = "MS111"
-    expected_path = os.path.join(customer_dir, case_number)
+    existing = os.path.join(sample_customer['directory'], "MS111")
+    os.mkdir(existing)
+    open(os.path.join(existing, "keep.txt"), "w").close()
 
-    # Simulate both customer dir AND case folder existing
-    mock_exists.side_effect = lambda path: path in [customer_dir, expected_path]
-
-    success = case_folder_ops.create_case_folder(customer_id, case_number, "", None)
-    assert success is False
+    with pytest.raises(FilesystemError, match="already exists"):
+        case_folder_ops.create_case_folder(sample_customer['id'], "MS111", "", None)
+    # The existing folder is left alone and nothing is recorded
+    assert os.listdir(existing) == ["keep.txt"]
+    assert db_conn.execute("SELECT COUNT(*) FROM case_folders").fetchone()[0] == 0
 
 def test_create_case_folder_invalid_case_number(case_folder_ops, sample_customer):
     """Test creating case folder with invalid case number (no MS prefix)."""
-    success = case_folder_ops.create_case_folder(sample_customer['id'], "12345", "Invalid", None)
-    assert success is False
-
-def test_get_case_folders(case_folder_ops, sample_customer, in_memory_db):
+    with pytest.raises(ValidationError):
+        case_folder_ops.create_case_folder(sample_customer['id'], "12345", "Invalid", None)
+    assert os.listdir(sample_customer['directory']) == []
+
+def test_create_case_folder_db_failure_removes_folder(case_folder_ops, sample_customer, sample_template, db_conn):
+    """A failed insert removes the folder layout that was just created."""
+    block_writes(db_conn, "INSERT")
+
+    with pytest.raises(DatabaseError):
+        case_folder_ops.create_case_folder(sample_customer['id'], "MS500", "Rollback", sample_template)
+    assert os.listdir(sample_customer['directory']) == []
+
+def test_create_case_folder_duplicate_path_record(case_folder_ops, sample_customer, db_conn):
+    """A stale record for the same path fails the insert; the new folder is removed again."""
+    case_path = os.path.join(sample_customer['directory'], "MS501")
+    add_case_row(db_conn, sample_customer['id'], "MS501", "", case_path)
+
+    with pytest.raises(DatabaseError, match="already exists"):
+        case_folder_ops.create_case_folder(sample_customer['id'], "MS501", "", None)
+    assert not os.path.exists(case_path)
+
+def test_remove_case_folder_layout(case_folder_ops, sample_customer, sample_template):
+    """_remove_case_folder_layout removes exactly what _build_case_folder created."""
+    case_path = os.path.join(sample_customer['directory'], "MS600")
+    info = {"case_number": "MS600", "description": "", "customer_id": sample_customer['id'],
+            "customer_name": sample_customer['name'], "created_at": datetime.now().isoformat()}
+    created = case_folder_ops._build_case_folder(case_path, "MS600", info, sample_template)
+    assert created[0] == (case_path, True)
+    assert (os.path.join(case_path, "case_info.txt"), False) in created
+
+    case_folder_ops._remove_case_folder_layout(created)
+    assert not os.path.exists(case_path)
+
+def test_remove_case_folder_layout_keeps_foreign_files(case_folder_ops, sample_customer, sample_template):
+    """A folder that gained unexpected content is not deleted; the OSError reaches the caller."""
+    case_path = os.path.join(sample_customer['directory'], "MS601")
+    info = {"case_number": "MS601", "description": "", "customer_id": sample_customer['id'],
+            "customer_name": sample_customer['name'], "created_at": datetime.now().isoformat()}
+    created = case_folder_ops._build_case_folder(case_path, "MS601", info, sample_template)
+    stray = os.path.join(case_path, "FolderA", "user_notes.txt")
+    open(stray, "w").close()
+
+    with pytest.raises(OSError):
+        case_folder_ops._remove_case_folder_layout(created)
+    assert os.path.exists(stray)
+
+def test_get_case_folders(case_folder_ops, sample_customer, db_conn):
     """Test retrieving case folders for a customer."""
     customer_id = sample_customer['id']
     # Add some dummy case folders to DB
-    cursor = in_memory_db.cursor()
-    cursor.execute("INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)",
-                   (customer_id, "MS001", "Desc 1", "/fake/cust/MS001", datetime.now().isoformat()))
-    cursor.execute("INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)",
-                   (customer_id, "MS002", "Desc 2", "/fake/cust/MS002", datetime.now().isoformat()))
-    in_memory_db.commit()
+    add_case_row(db_conn, customer_id, "MS001", "Desc 1", "/fake/cust/MS001")
+    add_case_row(db_conn, customer_id, "MS002", "Desc 2", "/fake/cust/MS002")
 
     folders = case_folder_ops.get_case_folders(customer_id)
     assert folders is not None
@@ -178,95 +217,265 @@ def test_get_case_folders_no_customer(case_folder_ops):
     folders = case_folder_ops.get_case_folders("non-existent-id")
     assert folders == []
 
-# Note: Need to import json for sample_template fixture
-import json
 
-@patch('os.path.exists')
-@patch('shutil.move')
-@patch('builtins.open', new_callable=mock_open)
-def test_move_case_folder_success(mock_open_call, mock_shutil_move, mock_os_exists, case_folder_ops, test_customer_ops, sample_customer, in_memory_db):
+# --- _move_folder ---
+
+def _make_case_dir(path):
+    os.mkdir(path)
+    with open(os.path.join(path, "case_info.txt"), "w") as f:
+        f.write("contents")
+
+def test_move_folder_rename(tmp_path):
+    """Same volume: a plain rename to an absent target."""
+    source, target = tmp_path / "src", tmp_path / "dst"
+    _make_case_dir(source)
+
+    _move_folder(str(source), str(target))
+    assert not source.exists()
+    assert (target / "case_info.txt").read_text() == "contents"
+
+@pytest.mark.skipif(os.name == 'nt', reason="Windows cannot rename onto a directory")
+def test_move_folder_onto_placeholder(tmp_path):
+    """Same volume: the rename takes over an empty placeholder directory."""
+    source, target = tmp_path / "src", tmp_path / "dst"
+    _make_case_dir(source)
+    target.mkdir()
+
+    _move_folder(str(source), str(target))
+    assert not source.exists()
+    assert (target / "case_info.txt").read_text() == "contents"
+
+def test_move_folder_cross_device_fallback(tmp_path, monkeypatch):
+    """EXDEV falls back to shutil.move after releasing the placeholder, so the folder is not nested inside it."""
+    source, target = tmp_path / "src", tmp_path / "dst"
+    _make_case_dir(source)
+    target.mkdir()
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "replace", cross_device)
+
+    _move_folder(str(source), str(target))
+    assert not source.exists()
+    assert os.listdir(target) == ["case_info.txt"]
+
+def test_move_folder_other_errors_propagate(tmp_path, monkeypatch):
+    """Errors other than EXDEV are raised instead of falling back to a copy."""
+    source, target = tmp_path / "src", tmp_path / "dst"
+    _make_case_dir(source)
+    def denied(src, dst):
+        raise PermissionError(errno.EACCES, "Permission denied")
+    monkeypatch.setattr(os, "replace", denied)
+
+    with pytest.raises(PermissionError):
+        _move_folder(str(source), str(target))
+    assert source.exists() and not target.exists()
+
+
+# --- move_case_folder ---
+
+@pytest.fixture
+def case_to_move(case_folder_ops, sample_customer, db_conn):
+    """A case folder created for sample_customer, returned as (case folder ID, path)."""
+    case_folder_ops.create_case_folder(sample_customer['id'], "MSMOVE01", "MoveMe", None)
+    row = db_conn.execute("SELECT id, path FROM case_folders WHERE case_number = 'MSMOVE01'").fetchone()
+    return row['id'], row['path']
+
+def test_move_case_folder_success(case_folder_ops, make_customer, sample_customer, case_to_move, db_conn):
     """Test successfully moving a case folder between customers."""
-    # --- Setup ---
-    # Source customer (already created by sample_customer fixture)
-    source_customer_id = sample_customer['id']
-    source_customer_dir = sample_customer['directory']
-
-    # Target customer
-    target_customer = test_customer_ops.add_customer("Target Cust", "", "", "", "", "/fake/target_cust")
-    assert target_customer is not None
-    target_customer_id = target_customer['id']
-    target_customer_dir = target_customer['directory']
-
-    # Case folder to move (add to DB first)
-    case_number = "MSMOVE01"
-    folder_name = f"{case_number}_MoveMe"
-    source_path = os.path.join(source_customer_dir, folder_name)
-    target_path = os.path.join(target_customer_dir, folder_name)
-    created_at = datetime.now().isoformat()
-
-    cursor = in_memory_db.cursor()
-    cursor.execute("INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)",
-                   (source_customer_id, case_number, "Move Me", source_path, created_at))
-    in_memory_db.commit()
-    # Get the generated ID
-    case_folder_id = cursor.lastrowid
-
-    # Mock filesystem: source customer dir, target customer dir, and source case path exist. Target case path does NOT exist.
-    mock_os_exists.side_effect = lambda path: path in [source_customer_dir, target_customer_dir, source_path]
-
-    # --- Action ---
-    success = case_folder_ops.move_case_folder(case_folder_id, target_customer_id)
-
-    # --- Assertions ---
+    case_folder_id, source_path = case_to_move
+    target_customer = make_customer("Target Cust")
+    target_path = os.path.join(target_customer['directory'], "MSMOVE01_MoveMe")
+
+    success = case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
+
     assert success is True
-    # Check filesystem move was called
-    mock_shutil_move.assert_called_once_with(source_path, target_path)
-    # Check if case_info.txt was opened and potentially written to (optional check)
-    # mock_open_call.assert_any_call(os.path.join(target_path, "case_info.txt"), 'r') # Check read
-    # mock_open_call.assert_any_call(os.path.join(target_path, "case_info.txt"), 'w') # Check write
-
-    # Verify DB update
-    cursor.execute("SELECT customer_id, path FROM case_folders WHERE id = ?", (case_folder_id,))
-    row = cursor.fetchone()
-    assert row is not None
-    assert dict(row)['customer_id'] == target_customer_id
+    assert not os.path.exists(source_path)
+    assert os.path.isdir(target_path)
+    # Verify DB update and audit entry
+    row = db_conn.execute("SELECT customer_id, path FROM case_folders WHERE id = ?", (case_folder_id,)).fetchone()
+    assert dict(row)['customer_id'] == target_customer['id']
     assert dict(row)['path'] == target_path
+    assert db_conn.execute("SELECT COUNT(*) FROM audit_log WHERE action = 'CASE_MOVE'").fetchone()[0] == 1
+
+def test_move_case_folder_rewrites_case_info(case_folder_ops, make_customer, sample_customer, case_to_move):
+    """case_info.txt names the new owner once and records where the folder came from."""
+    case_folder_id, _ = case_to_move
+    # A backslash in the name must be written literally, not read as a regex escape
+    target_customer = make_customer(r"Target \1 Cust")
+
+    case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
 
-@patch('os.path.exists')
-@patch('shutil.move')
-def test_move_case_folder_target_exists(mock_shutil_move, mock_os_exists, case_folder_ops, test_customer_ops, sample_customer, in_memory_db):
+    with open(os.path.join(target_customer['directory'], "MSMOVE01_MoveMe", "case_info.txt")) as f:
+        info = f.read()
+    assert info.count("Customer ID:") == 1 and f"Customer ID: {target_customer['id']}\n" in info
+    assert info.count("Customer Name:") == 1 and "Customer Name: Target \\1 Cust\n" in info
+    assert "Case Number: MSMOVE01\n" in info
+    assert f"Moved from: {sample_customer['name']} (ID: {sample_customer['id']})" in info
+
+def test_move_case_folder_appends_missing_info_lines(case_folder_ops, make_customer, case_to_move):
+    """Owner lines missing from an edited case_info.txt are appended."""
+    case_folder_id, source_path = case_to_move
+    with open(os.path.join(source_path, "case_info.txt"), "w") as f:
+        f.write("Case Number: MSMOVE01")
+    target_customer = make_customer("Target Cust")
+
+    case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
+
+    with open(os.path.join(target_customer['directory'], "MSMOVE01_MoveMe", "case_info.txt")) as f:
+        lines = f.read().splitlines()
+    assert lines[:3] == ["Case Number: MSMOVE01", f"Customer ID: {target_customer['id']}", "Customer Name: Target Cust"]
+
+def test_move_case_folder_target_exists(case_folder_ops, make_customer, sample_customer, case_to_move, db_conn):
     """Test moving a case folder when a folder with the same name exists at the target."""
-    # Setup similar to success case...
-    source_customer_id = sample_customer['id']
-    source_customer_dir = sample_customer['directory']
-    target_customer = test_customer_ops.add_customer("Target Cust 2", "", "", "", "", "/fake/target_cust2")
-    target_customer_id = target_customer['id']
-    target_customer_dir = target_customer['directory']
-    case_number = "MSMOVE02"
-    folder_name = f"{case_number}_Exists"
-    source_path = os.path.join(source_customer_dir, folder_name)
-    target_path = os.path.join(target_customer_dir, folder_name)
-    cursor = in_memory_db.cursor()
-    cursor.execute("INSERT INTO case_folders (customer_id, case_number, description, path, created_at) VALUES (?, ?, ?, ?, ?)",
-                   (source_customer_id, case_number, "Exists", source_path, datetime.now().isoformat()))
-    in_memory_db.commit()
-    case_folder_id = cursor.lastrowid
-
-    # Mock filesystem: All relevant paths exist, including the target case path
-    mock_os_exists.return_value = True
-
-    # Action
-    success = case_folder_ops.move_case_folder(case_folder_id, target_customer_id)
-
-    # Assertions
-    assert success is False
-    mock_shutil_move.assert_not_called() # Should not attempt move if target exists
-
-    # Verify DB record is unchanged
-    cursor.execute("SELECT customer_id, path FROM case_folders WHERE id = ?", (case_folder_id,))
-    row = cursor.fetchone()
-    assert row is not None
-    assert dict(row)['customer_id'] == source_customer_id # Still belongs to source
+    case_folder_id, source_path = case_to_move
+    target_customer = make_customer("Target Cust 2")
+    existing = os.path.join(target_customer['directory'], "MSMOVE01_MoveMe")
+    os.mkdir(existing) # Even an empty folder blocks the mkdir reservation
+
+    with pytest.raises(FilesystemError, match="already exists"):
+        case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
+
+    # Source untouched, the target's folder left in place, DB record unchanged
+    assert os.path.isdir(source_path)
+    assert os.listdir(existing) == []
+    row = db_conn.execute("SELECT customer_id, path FROM case_folders WHERE id = ?", (case_folder_id,)).fetchone()
+    assert dict(row)['customer_id'] == sample_customer['id'] # Still belongs to source
     assert dict(row)['path'] == source_path # Path unchanged
 
-# Add test for open_case_folder (needs mocking os.path.exists and utils.open_directory)
+def test_move_case_folder_failed_move_releases_reservation(case_folder_ops, make_customer, case_to_move, monkeypatch):
+    """If the move itself fails, the reserved target name is given back."""
+    case_folder_id, source_path = case_to_move
+    target_customer = make_customer("Target Cust")
+    def failing_move(source, target):
+        raise OSError(errno.EIO, "I/O error")
+    monkeypatch.setattr(case_folder_operations, "_move_folder", failing_move)
+
+    with pytest.raises(FilesystemError):
+        case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
+    assert os.path.isdir(source_path)
+    assert os.listdir(target_customer['directory']) == []
+
+def test_move_case_folder_db_failure_moves_back(case_folder_ops, make_customer, sample_customer, case_to_move, db_conn):
+    """A failed record update moves the folder back to its source."""
+    case_folder_id, source_path = case_to_move
+    target_customer = make_customer("Target Cust")
+    block_writes(db_conn, "UPDATE")
+
+    with pytest.raises(DatabaseError):
+        case_folder_ops.move_case_folder(case_folder_id, target_customer['id'])
+    assert os.path.isfile(os.path.join(source_path, "case_info.txt"))
+    assert os.listdir(target_customer['directory']) == []
+    row = db_conn.execute("SELECT customer_id FROM case_folders WHERE id = ?", (case_folder_id,)).fetchone()
+    assert row['customer_id'] == sample_customer['id']
+
+
+# --- create_case_folders ---
+
+def case_index_exists(db_conn):
+    return db_conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_case_customer_id'").fetchone() is not None
+
+def test_create_case_folders_batch(case_folder_ops, make_customer, sample_template, db_conn):
+    """A batch across customers creates every folder and records all rows with one audit entry."""
+    first, second = make_customer("Batch One"), make_customer("Batch Two")
+    records = [
+        {"customer_id": first['id'], "case_number": "MS100", "description": "Alpha", "template": sample_template},
+        {"customer_id": first['id'], "case_number": "MS101"},
+        {"customer_id": second['id'], "case_number": "MS100", "description": "Alpha"},
+    ]
+
+    assert case_folder_ops.create_case_folders(records) == 3
+
+    assert os.path.isdir(os.path.join(first['directory'], "MS100_Alpha", "FolderB", "Drafts"))
+    assert os.path.isdir(os.path.join(first['directory'], "MS101"))
+    assert os.path.isdir(os.path.join(second['directory'], "MS100_Alpha"))
+    rows = db_conn.execute("SELECT customer_id, case_number, path, created_at FROM case_folders ORDER BY id").fetchall()
+    assert [(r['customer_id'], r['case_number']) for r in rows] == [(first['id'], "MS100"), (first['id'], "MS101"), (second['id'], "MS100")]
+    assert len({r['created_at'] for r in rows}) == 1 # One timestamp for the batch
+    audit = db_conn.execute("SELECT details FROM audit_log WHERE action = 'CASE_ADD_MULTI'").fetchall()
+    assert len(audit) == 1
+    assert json.loads(audit[0]['details'])['paths'] == [r['path'] for r in rows]
+
+def test_create_case_folders_empty(case_folder_ops):
+    assert case_folder_ops.create_case_folders([]) == 0
+
+def test_create_case_folders_duplicate_in_batch(case_folder_ops, sample_customer, db_conn):
+    """Two records resolving to the same folder are rejected before anything is created."""
+    records = [
+        {"customer_id": sample_customer['id'], "case_number": "MS200", "description": "Same"},
+        {"customer_id": sample_customer['id'], "case_number": "MS201"},
+        {"customer_id": sample_customer['id'], "case_number": "MS200", "description": "Same"},
+    ]
+
+    with pytest.raises(ValidationError, match="Duplicate"):
+        case_folder_ops.create_case_folders(records)
+    assert os.listdir(sample_customer['directory']) == []
+    assert db_conn.execute("SELECT COUNT(*) FROM case_folders").fetchone()[0] == 0
+
+def test_create_case_folders_invalid_record(case_folder_ops, sample_customer):
+    """Every record is validated before the first folder is created."""
+    records = [
+        {"customer_id": sample_customer['id'], "case_number": "MS300"},
+        {"customer_id": sample_customer['id'], "case_number": "300"},
+    ]
+
+    with pytest.raises(ValidationError):
+        case_folder_ops.create_case_folders(records)
+    assert os.listdir(sample_customer['directory']) == []
+
+def test_create_case_folders_filesystem_failure_cleans_up(case_folder_ops, sample_customer, sample_template, db_conn):
+    """If one folder cannot be created, the folders already created for the batch are removed."""
+    os.mkdir(os.path.join(sample_customer['directory'], "MS402")) # Collides with the last record
+    records = [{"customer_id": sample_customer['id'], "case_number": f"MS40{i}", "template": sample_template} for i in range(3)]
+
+    with pytest.raises(FilesystemError):
+        case_folder_ops.create_case_folders(records)
+    assert os.listdir(sample_customer['directory']) == ["MS402"]
+    assert db_conn.execute("SELECT COUNT(*) FROM case_folders").fetchone()[0] == 0
+
+def test_create_case_folders_db_failure_cleans_up(case_folder_ops, sample_customer, sample_template, db_conn):
+    """A failed insert rolls back the batch and removes all of its folders."""
+    block_writes(db_conn, "INSERT")
+    records = [{"customer_id": sample_customer['id'], "case_number": f"MS50{i}", "template": sample_template} for i in range(3)]
+
+    with pytest.raises(DatabaseError):
+        case_folder_ops.create_case_folders(records)
+    assert os.listdir(sample_customer['directory']) == []
+    assert db_conn.execute("SELECT COUNT(*) FROM case_folders").fetchone()[0] == 0
+    assert not db_conn.in_transaction
+
+def test_create_case_folders_rebuilds_index(case_folder_ops, sample_customer, db_conn, monkeypatch):
+    """At CASE_INDEX_REBUILD_MIN_ROWS the customer_id index is dropped and rebuilt around the insert."""
+    monkeypatch.setattr(case_folder_operations, "CASE_INDEX_REBUILD_MIN_ROWS", 3)
+    statements = []
+    db_conn.set_trace_callback(statements.append)
+    records = [{"customer_id": sample_customer['id'], "case_number": f"MS60{i}"} for i in range(3)]
+
+    assert case_folder_ops.create_case_folders(records) == 3
+
+    db_conn.set_trace_callback(None)
+    assert case_folder_operations._DROP_CASE_CUSTOMER_INDEX in statements
+    assert case_folder_operations._CREATE_CASE_CUSTOMER_INDEX in statements
+    assert case_index_exists(db_conn)
+    assert len(case_folder_ops.get_case_folders(sample_customer['id'])) == 3
+
+def test_create_case_folders_below_threshold_keeps_index(case_folder_ops, sample_customer, db_conn, monkeypatch):
+    """Smaller batches leave the index in place."""
+    monkeypatch.setattr(case_folder_operations, "CASE_INDEX_REBUILD_MIN_ROWS", 3)
+    statements = []
+    db_conn.set_trace_callback(statements.append)
+
+    case_folder_ops.create_case_folders([{"customer_id": sample_customer['id'], "case_number": f"MS61{i}"} for i in range(2)])
+
+    db_conn.set_trace_callback(None)
+    assert case_folder_operations._DROP_CASE_CUSTOMER_INDEX not in statements
+    assert case_index_exists(db_conn)
+
+def test_create_case_folders_rebuild_failure_restores_index(case_folder_ops, sample_customer, db_conn, monkeypatch):
+    """The index DROP is part of the batch transaction, so a failed insert brings the index back."""
+    monkeypatch.setattr(case_folder_operations, "CASE_INDEX_REBUILD_MIN_ROWS", 2)
+    block_writes(db_conn, "INSERT")
+
+    with pytest.raises(DatabaseError):
+        case_folder_ops.create_case_folders([{"customer_id": sample_customer['id'], "case_number": f"MS62{i}"} for i in range(2)])
+    assert case_index_exists(db_conn)
+    assert os.listdir(sample_customer['directory']) == []
@@ -2,11 +2,14 @@ import pytest
 import sqlite3
 import os
 import uuid
+import csv
+import json
 from datetime import datetime
 
 # Modules to test
 from data_manager import DataManager
-from customer_operations import CustomerOperations
+import customer_operations
+from customer_operations import CustomerOperations, CUSTOMER_EXPORT_FIELDS
 
 # --- Test Fixtures ---
 
@@ -182,6 +185,16 @@ def test_update_customer_success(customer_ops, in_memory_db):
     assert dict(row)["email"] == "updated@example.com"
     assert dict(row)["phone"] == "9998887777"
 
+def test_update_customer_unchanged_skips_write(customer_ops, in_memory_db):
+    """Test that an update repeating the stored values succeeds without writing."""
+    added_customer = customer_ops.add_customer("Same Name", "same@example.com", "222", "Addr", "Notes", "/same/name")
+    customer_id = added_customer["id"]
+    changes_before = in_memory_db.total_changes
+
+    success = customer_ops.update_customer(customer_id, name="Same Name", email="same@example.com")
+    assert success is True
+    assert in_memory_db.total_changes == changes_before
+
 def test_update_customer_not_found(customer_ops):
     """Test updating a non-existent customer ID."""
     non_existent_id = str(uuid.uuid4())
@@ -229,6 +242,40 @@ def test_delete_multiple_customers(customer_ops, in_memory_db):
     count_kept = cursor.fetchone()[0]
     assert count_kept == 1
 
+def test_update_multiple_customers(customer_ops, in_memory_db):
+    """Test applying the same updates to multiple customers."""
+    cust1 = customer_ops.add_customer("Upd Multi 1", "", "", "", "", "/upd/multi1")
+    cust2 = customer_ops.add_customer("Upd Multi 2", "", "", "", "", "/upd/multi2")
+    cust3 = customer_ops.add_customer("Leave Me", "", "", "", "", "/leave/me")
+    ids_to_update = [cust1["id"], cust2["id"]]
+
+    updated_count = customer_ops.update_multiple_customers(ids_to_update, email="bulk@example.com", phone="555")
+    assert updated_count == 2
+
+    # Verify in DB
+    cursor = in_memory_db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM customers WHERE email = ? AND phone = ?", ("bulk@example.com", "555"))
+    assert cursor.fetchone()[0] == 2
+
+    cursor.execute("SELECT email FROM customers WHERE id = ?", (cust3["id"],))
+    assert dict(cursor.fetchone())["email"] == ""
+
+def test_add_multiple_customers_skips_existing_directories(customer_ops, in_memory_db):
+    """Test batch insert counts only new rows and skips directories already in the DB."""
+    customer_ops.add_customer("Existing", "", "", "", "", "/batch/existing")
+    batch = [
+        {"name": "Batch 1", "directory": "/batch/one", "email": "one@example.com"},
+        {"name": "Batch 2", "directory": "/batch/two"},
+        {"name": "Duplicate", "directory": "/batch/existing"},
+    ]
+
+    added_count = customer_ops.add_multiple_customers(batch)
+    assert added_count == 2
+
+    cursor = in_memory_db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM customers")
+    assert cursor.fetchone()[0] == 3
+
 def test_rename_customer_success(customer_ops, in_memory_db):
     """Test successfully renaming a customer."""
     added_customer = customer_ops.add_customer("Rename Me", "", "", "", "", "/rename/me")
@@ -259,3 +306,77 @@ def test_rename_customer_empty_name(customer_ops):
     # Expect rename_customer to handle messagebox and return False
     success = customer_ops.rename_customer(customer_id, "  ") # Empty after strip
     assert success is False
+
+
+# --- Export round trips ---
+
+EXPORT_CUSTOMERS = [
+    {"id": "c1", "name": "Ada Lovelace", "email": "ada@example.com", "phone": "555-0101", "address": "1 Main St",
+     "notes": "Line one\nline two, with \"quotes\"", "directory": "/customers/ada", "created_at": "2024-01-01T10:00:00"},
+    {"id": "c2", "name": "Zoë Ørsted-Łukasiewicz", "email": "zoe@example.com", "phone": "", "address": "Straße 5, Köln",
+     "notes": "日本語のメモ", "directory": "/customers/zoë", "created_at": "2024-01-02T11:30:00"},
+]
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request, monkeypatch):
+    """Run JSON export tests with orjson (when installed) and with the stdlib fallback."""
+    if request.param == "orjson" and customer_operations.orjson is None:
+        pytest.skip("orjson not installed")
+    if request.param == "json":
+        monkeypatch.setattr(customer_operations, "orjson", None)
+    return request.param
+
+@pytest.mark.parametrize("customers", [EXPORT_CUSTOMERS, []], ids=["customers", "empty"])
+def test_export_csv_round_trip(customer_ops, tmp_path, customers):
+    """The CSV export reads back with DictReader as the input rows, in field order."""
+    path = tmp_path / "export.csv"
+    assert customer_ops.export_customers_to_csv(iter(customers), str(path)) is True
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == CUSTOMER_EXPORT_FIELDS
+        assert list(reader) == customers
+
+def test_export_csv_missing_fields_written_empty(customer_ops, tmp_path):
+    path = tmp_path / "export.csv"
+    customer_ops.export_customers_to_csv([{"id": "c3", "name": "Partial"}], str(path))
+
+    with open(path, newline="", encoding="utf-8") as f:
+        row, = csv.DictReader(f)
+    assert row == {**dict.fromkeys(CUSTOMER_EXPORT_FIELDS, ""), "id": "c3", "name": "Partial"}
+
+@pytest.mark.parametrize("customers", [EXPORT_CUSTOMERS, []], ids=["customers", "empty"])
+def test_export_json_round_trip(customer_ops, tmp_path, json_backend, customers):
+    """The streamed JSON array loads back as the input list, non-ASCII names included."""
+    path = tmp_path / "export.json"
+    assert customer_ops.export_customers_to_json(iter(customers), str(path)) is True
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == customers
+
+def test_export_json_layout(customer_ops, tmp_path, json_backend):
+    """Both backends write the same file: json.dump(customers, f, indent=2, ensure_ascii=False)."""
+    for customers in (EXPORT_CUSTOMERS, []):
+        path = tmp_path / "export.json"
+        customer_ops.export_customers_to_json(iter(customers), str(path))
+        assert path.read_bytes() == json.dumps(customers, indent=2, ensure_ascii=False).encode("utf-8")
+
+@pytest.mark.parametrize("customers", [EXPORT_CUSTOMERS, []], ids=["customers", "empty"])
+def test_export_json_columnar_round_trip(customer_ops, tmp_path, json_backend, customers):
+    """The columnar layout holds one list per export field; zipping the lists rebuilds the rows."""
+    path = tmp_path / "export_columnar.json"
+    assert customer_ops.export_customers_to_json_columnar(iter(customers), str(path)) is True
+
+    with open(path, encoding="utf-8") as f:
+        columns = json.load(f)["columns"]
+    assert list(columns) == CUSTOMER_EXPORT_FIELDS
+    assert all(len(values) == len(customers) for values in columns.values())
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    assert rows == customers
+
+def test_export_json_columnar_layout(customer_ops, tmp_path, json_backend):
+    """Both backends write the same compact, raw UTF-8 columnar file."""
+    path = tmp_path / "export_columnar.json"
+    customer_ops.export_customers_to_json_columnar(iter(EXPORT_CUSTOMERS), str(path))
+    columns = {field: [c.get(field) for c in EXPORT_CUSTOMERS] for field in CUSTOMER_EXPORT_FIELDS}
+    assert path.read_bytes() == json.dumps({"columns": columns}, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -4,7 +4,7 @@ import logging
 import tkinter as tk
 from tkinter import messagebox, ttk
 
-from utils import open_directory
+from utils import open_directory, nocase_key
 
 class TreeviewManager:
     """Handles operations related to the treeviews for customers and case folders"""
@@ -20,11 +20,27 @@ class TreeviewManager:
     def refresh_customer_list(self):
         """Refresh the customer treeview using data from self.parent.customers"""
         logging.debug("Refreshing customer treeview...")
-        for item in self.parent.customer_tree.get_children():
-            self.parent.customer_tree.delete(item)
-        self.parent.event_handler.on_search_changed() 
+        self.parent.event_handler.on_search_changed() # Clears the tree and repopulates it from the cache
         logging.debug("Customer treeview refresh triggered (population depends on search handler).")
 
+    def add_customer(self, customer, index):
+        """
+        Show a customer just added to self.parent.customers at index (as returned by _index_add).
+        While the tree lists every customer in the cache's name order, a single row is inserted at
+        that position; while a search filter or another column sort is active, or the tree is still
+        being filled, it is redrawn instead.
+        Nothing is done before the tree's first fill, which will include the customer.
+        """
+        handler = self.parent.event_handler
+        if not handler._customer_tree_loaded:
+            return
+        name_order = self.customer_sort_column == "name" and not self.customer_sort_reverse
+        if not name_order or handler._populate_job is not None or self.parent.search_var.get().split():
+            self.refresh_customer_list()
+            return
+        # The tree holds the same rows in the same order as the cache, so the cache index applies
+        handler.add_customer_to_tree(customer, index)
+
     def refresh_case_list(self):
         """Refresh the list of case folders from the database"""
         logging.debug("Refreshing case treeview...")
@@ -45,7 +61,7 @@ class TreeviewManager:
 
         # Get case folders from the database via case_ops
         case_folders = self.parent.case_ops.get_case_folders(selected_customer_id)
-        logging.debug(f"Retrieved {len(case_folders)} case folders from DB for customer {selected_customer_id}.")
+        logging.debug("Retrieved %d case folders from DB for customer %s.", len(case_folders), selected_customer_id)
 
         # Apply filter if needed
         filtered_folders = []
@@ -106,7 +122,7 @@ class TreeviewManager:
                     created_display # Displayed column 3 ('created')
                 )
             )
-        logging.debug(f"Populated case treeview with {len(filtered_folders)} items.")
+        logging.debug("Populated case treeview with %d items.", len(filtered_folders))
 
         # Update the status bar
         status_msg = f"Loaded {len(filtered_folders)} case folders."
@@ -122,7 +138,7 @@ class TreeviewManager:
              logging.warning("add_case_to_tree called with invalid data.")
              return
 
-        logging.debug(f"Adding single case folder to tree: ID {folder.get('id')}")
+        logging.debug("Adding single case folder to tree: ID %s", folder.get('id'))
         created_display = folder.get('created_at', '')
         try:
             dt_obj = datetime.datetime.strptime(created_display, "%Y-%m-%d %H:%M")
@@ -155,10 +171,11 @@ class TreeviewManager:
 
         # The item ID ('iid') is now the database ID
         case_folder_id = selected_items[0]
-        logging.debug(f"Attempting to open case folder with DB ID: {case_folder_id}")
+        logging.debug("Attempting to open case folder with DB ID: %s", case_folder_id)
 
         # Call the updated case_ops method
-        if not self.parent.case_ops.open_case_folder(case_folder_id):
+        case_path = self.parent.case_tree.set(case_folder_id, "path") # Hidden column; saves a DB lookup
+        if not self.parent.case_ops.open_case_folder(case_folder_id, case_path):
              # Error message is handled within open_case_folder
              pass
 
@@ -174,8 +191,9 @@ class TreeviewManager:
                 # Try converting to float for sorting numeric-like columns
                 data_list.sort(key=lambda t: float(t[0]), reverse=reverse)
             except ValueError:
-                # Fallback to case-insensitive string sort
-                data_list.sort(key=lambda t: str(t[0]).lower(), reverse=reverse)
+                # Fallback to case-insensitive string sort, folded like the DB's COLLATE NOCASE so a
+                # name sort matches the cached customer order that add_customer inserts into
+                data_list.sort(key=lambda t: nocase_key(str(t[0])), reverse=reverse)
 
             for index, (val, item_id) in enumerate(data_list):
                 tree.move(item_id, '', index)
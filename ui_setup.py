@@ -5,6 +5,14 @@ import logging
 
 from ui_components import add_tooltip
 
+# (label, parent StringVar attribute, tooltip) for the single-line Add Customer fields
+CUSTOMER_INFO_FIELDS = [
+    ("Name:", "name_var", "Customer's name"),
+    ("Email:", "email_var", "Customer's email"),
+    ("Phone:", "phone_var", "Customer's phone"),
+    ("Address:", "address_var", "Customer's address"),
+]
+
 class UISetup:
     """Handles the UI setup for the Customer Manager application"""
     
@@ -52,25 +60,16 @@ class UISetup:
         """Setup the customer information frame in Add Customer tab"""
         info_frame = ttk.LabelFrame(self.parent.add_customer_tab, text="Customer Information")
         info_frame.pack(fill='both', expand=True, padx=10, pady=10)
-        ttk.Label(info_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.parent.name_var = tk.StringVar()
-        name_entry = ttk.Entry(info_frame, textvariable=self.parent.name_var, width=40)
-        name_entry.grid(row=0, column=1, padx=5, pady=5, sticky='w'); add_tooltip(name_entry, "Customer's name")
-        ttk.Label(info_frame, text="Email:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
-        self.parent.email_var = tk.StringVar()
-        email_entry = ttk.Entry(info_frame, textvariable=self.parent.email_var, width=40)
-        email_entry.grid(row=1, column=1, padx=5, pady=5, sticky='w'); add_tooltip(email_entry, "Customer's email")
-        ttk.Label(info_frame, text="Phone:").grid(row=2, column=0, padx=5, pady=5, sticky='w')
-        self.parent.phone_var = tk.StringVar()
-        phone_entry = ttk.Entry(info_frame, textvariable=self.parent.phone_var, width=40)
-        phone_entry.grid(row=2, column=1, padx=5, pady=5, sticky='w'); add_tooltip(phone_entry, "Customer's phone")
-        ttk.Label(info_frame, text="Address:").grid(row=3, column=0, padx=5, pady=5, sticky='w')
-        self.parent.address_var = tk.StringVar()
-        address_entry = ttk.Entry(info_frame, textvariable=self.parent.address_var, width=40)
-        address_entry.grid(row=3, column=1, padx=5, pady=5, sticky='w'); add_tooltip(address_entry, "Customer's address")
-        ttk.Label(info_frame, text="Notes:").grid(row=4, column=0, padx=5, pady=5, sticky='nw')
+        for row, (label, var_name, tooltip) in enumerate(CUSTOMER_INFO_FIELDS):
+            ttk.Label(info_frame, text=label).grid(row=row, column=0, padx=5, pady=5, sticky='w')
+            var = tk.StringVar()
+            setattr(self.parent, var_name, var)
+            entry = ttk.Entry(info_frame, textvariable=var, width=40)
+            entry.grid(row=row, column=1, padx=5, pady=5, sticky='w'); add_tooltip(entry, tooltip)
+        notes_row = len(CUSTOMER_INFO_FIELDS)
+        ttk.Label(info_frame, text="Notes:").grid(row=notes_row, column=0, padx=5, pady=5, sticky='nw')
         self.parent.notes_text = tk.Text(info_frame, width=40, height=5)
-        self.parent.notes_text.grid(row=4, column=1, padx=5, pady=5, sticky='w'); add_tooltip(self.parent.notes_text, "Notes")
+        self.parent.notes_text.grid(row=notes_row, column=1, padx=5, pady=5, sticky='w'); add_tooltip(self.parent.notes_text, "Notes")
 
     def _setup_add_customer_directory_section(self):
         """Setup the directory section in the Add Customer tab"""
@@ -135,6 +134,8 @@ class UISetup:
         csv_btn.pack(side='top', padx=5, pady=2, fill='x'); add_tooltip(csv_btn, "Export to CSV (Ctrl+E)")
         json_btn = ttk.Button(export_group, text="JSON", command=lambda: self.parent.export_customers("json"))
         json_btn.pack(side='top', padx=5, pady=2, fill='x'); add_tooltip(json_btn, "Export to JSON")
+        columnar_check = ttk.Checkbutton(export_group, text="Columnar", variable=self.parent.export_columnar_var)
+        columnar_check.pack(side='top', padx=5, pady=2, anchor='w'); add_tooltip(columnar_check, "JSON export as one list per field")
 
     def setup_case_folder_tab(self):
         """Setup the Case Folder tab"""
@@ -1,4 +1,7 @@
 import os
+import sys
+import string
+import subprocess
 import json # Keep json import for potential future use, though load/save removed
 import tkinter as tk
 from tkinter import messagebox, simpledialog
@@ -88,10 +91,8 @@ def open_directory(directory):
         if os.name == 'nt':  # Windows
             os.startfile(os.path.realpath(directory)) # Use realpath for safety
         elif sys.platform == 'darwin': # macOS
-             import subprocess
              subprocess.check_call(['open', directory])
         else: # Linux and other POSIX
-            import subprocess
             subprocess.check_call(['xdg-open', directory])
     except FileNotFoundError:
          logging.error(f"File explorer command not found for opening directory: {directory}")
@@ -100,6 +101,17 @@ def open_directory(directory):
         logging.error(f"Failed to open directory '{directory}': {e}")
         messagebox.showerror("Error", f"Failed to open directory:\n{e}")
 
+# SQLite's COLLATE NOCASE folds only ASCII letters (str.lower() also folds 'É', 'Ö', ...)
+_ASCII_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def nocase_key(text):
+    """Sort key matching SQLite's COLLATE NOCASE, so Python-sorted lists agree with ORDER BY ... COLLATE NOCASE."""
+    return text.translate(_ASCII_FOLD)
+
+def customer_name_key(customer):
+    """Sort key for customer dicts in the order load_customers returns them (name COLLATE NOCASE)."""
+    return nocase_key(customer.get("name") or "")
+
 def generate_unique_filename(base_dir, base_name, extension):
     """Generate a unique filename with incrementing number if file exists."""
     # Ensure extension doesn't start with a dot if base_name already has one
@@ -120,6 +132,3 @@ def generate_unique_filename(base_dir, base_name, extension):
              return f"{base_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
              
     return filename
-
-# Need sys import for platform check in open_directory
-import sys